@@ -0,0 +1,10 @@
+import pytest
+
+from core.budgets import assert_within_budget
+
+
+@pytest.fixture
+def within_budget(client):
+    def check(url, test_client=None, **kwargs):
+        return assert_within_budget(test_client or client, url, **kwargs)
+    return check
@@ -0,0 +1,18 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestViewBudgets:
+
+    def test_feeds_within_budget(self, user_client, within_budget,
+                                 few_posts_with_group):
+        post = few_posts_with_group
+        urls = (
+            '/',
+            f'/group/{post.group.slug}/',
+            f'/profile/{post.author.username}/',
+            f'/posts/{post.id}/',
+        )
+        for url in urls:
+            within_budget(url, user_client)
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # Задачи очереди объявляются в модулях tasks.py приложений
+        autodiscover_modules('tasks')
+        from . import checks, db  # noqa: F401
+        connection_created.connect(db.configure_sqlite)
+        request_started.connect(db.check_connections)
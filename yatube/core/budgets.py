@@ -0,0 +1,149 @@
+import time
+from collections import Counter, namedtuple
+from contextlib import ExitStack
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.urls import resolve
+
+Budget = namedtuple('Budget', ('queries', 'sql_ms', 'render_ms'))
+
+# Запросы, которые добавляет авторизация: сессия и пользователь (из базы,
+# если кеш не общий) и подписки пользователя для ETag
+AUTHENTICATED_QUERIES = 3
+
+# Бюджеты страниц для анонимного читателя, в одном месте. Без общего
+# кеша ETag ленты стоит запросов MAX(modified) и числа постов
+VIEW_BUDGETS = {
+    'posts:index': Budget(queries=4, sql_ms=50, render_ms=300),
+    'posts:group_list': Budget(queries=5, sql_ms=50, render_ms=300),
+    'posts:profile': Budget(queries=5, sql_ms=50, render_ms=300),
+    'posts:post_detail': Budget(queries=2, sql_ms=30, render_ms=200),
+    'posts:search': Budget(queries=3, sql_ms=50, render_ms=300),
+    'posts:follow_index': Budget(queries=3, sql_ms=50, render_ms=300),
+    # Подписка пишет счётчик и дозаполняет ленту, считая точки сохранения
+    'posts:profile_follow': Budget(queries=12, sql_ms=50, render_ms=200),
+    'posts:profile_unfollow': Budget(queries=10, sql_ms=50, render_ms=200),
+    'posts:group_follow': Budget(queries=12, sql_ms=50, render_ms=200),
+    'posts:group_unfollow': Budget(queries=10, sql_ms=50, render_ms=200),
+    'posts:post_create': Budget(queries=1, sql_ms=30, render_ms=200),
+    'posts:post_edit': Budget(queries=2, sql_ms=30, render_ms=200),
+    'users:signup': Budget(queries=0, sql_ms=30, render_ms=200),
+    'users:login': Budget(queries=0, sql_ms=30, render_ms=200),
+    # Выход удаляет сессию и заводит новую
+    'users:logout': Budget(queries=2, sql_ms=30, render_ms=200),
+    'users:password_change_form': Budget(
+        queries=0, sql_ms=30, render_ms=200
+    ),
+    'users:password_change_done': Budget(
+        queries=0, sql_ms=30, render_ms=200
+    ),
+    'users:password_reset_form': Budget(queries=0, sql_ms=30, render_ms=200),
+    'users:password_reset_done': Budget(queries=0, sql_ms=30, render_ms=200),
+}
+
+
+class Measurement:
+    """Запросы к базе и время одного ответа."""
+
+    def __init__(self, view_name, authenticated=False):
+        self.view_name = view_name
+        self.authenticated = authenticated
+        self.queries = []
+        self.total_ms = 0
+
+    @property
+    def sql_ms(self):
+        return sum(duration for _, duration in self.queries)
+
+    @property
+    def render_ms(self):
+        # Всё, что не SQL: код представления и шаблоны
+        return self.total_ms - self.sql_ms
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (sql, (time.perf_counter() - started) * 1000)
+            )
+
+    def report(self):
+        lines = [
+            f'{self.view_name}: {len(self.queries)} запросов, '
+            f'SQL {self.sql_ms:.1f} мс, остальное {self.render_ms:.1f} мс'
+        ]
+        repeated = Counter(sql for sql, _ in self.queries)
+        for sql, duration in sorted(
+                self.queries, key=lambda query: -query[1]):
+            times = repeated[sql]
+            lines.append(
+                f'  {duration:7.2f} мс'
+                f'{f" (x{times})" if times > 1 else ""}  {sql}'
+            )
+        return '\n'.join(lines)
+
+
+def measure(client, url, method='get', **kwargs):
+    """Выполняет запрос тестовым клиентом и замеряет его."""
+    # Смотрим на куку до запроса: выход из системы сбрасывает сессию
+    session = client.cookies.get(settings.SESSION_COOKIE_NAME)
+    measurement = Measurement(
+        resolve(urlsplit(url).path).view_name,
+        bool(session and session.value),
+    )
+    with ExitStack() as stack:
+        # С репликами чтения идут не через default
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(measurement))
+        started = time.perf_counter()
+        response = getattr(client, method)(url, **kwargs)
+        measurement.total_ms = (time.perf_counter() - started) * 1000
+    return measurement, response
+
+
+def budget_errors(measurement, budget=None):
+    """Список нарушений бюджета запросов страницы. Время здесь
+    не проверяется: на медленной машине тесты падали бы без причины,
+    его сверяет с бюджетом benchmark_feeds --check-budgets."""
+    budget = budget or VIEW_BUDGETS[measurement.view_name]
+    queries = budget.queries
+    if measurement.authenticated:
+        queries += AUTHENTICATED_QUERIES
+    if len(measurement.queries) > queries:
+        return [f'запросов {len(measurement.queries)} > {queries}']
+    return []
+
+
+def timing_errors(budget, sql_ms, render_ms):
+    """Список нарушений бюджета времени: SQL и всё остальное, в мс."""
+    errors = []
+    if sql_ms > budget.sql_ms:
+        errors.append(f'SQL {sql_ms:.1f} > {budget.sql_ms} мс')
+    if render_ms > budget.render_ms:
+        errors.append(f'рендер {render_ms:.1f} > {budget.render_ms} мс')
+    return errors
+
+
+def assert_within_budget(client, url, budget=None, method='get', **kwargs):
+    """Запрашивает url и падает с отчётом по SQL при превышении бюджета."""
+    measurement, response = measure(client, url, method, **kwargs)
+    errors = budget_errors(measurement, budget)
+    if errors:
+        raise AssertionError(
+            f'Превышен бюджет {url}: {", ".join(errors)}\n'
+            f'{measurement.report()}'
+        )
+    return response
+
+
+class BudgetTestMixin:
+    """Примесь к TestCase с проверкой бюджета страницы."""
+
+    def assertWithinBudget(self, url, client=None, budget=None, **kwargs):
+        return assert_within_budget(
+            client or self.client, url, budget, **kwargs
+        )
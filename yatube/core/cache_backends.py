@@ -0,0 +1,236 @@
+import pickle
+import socket
+import threading
+from urllib.parse import urlparse
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+DEFAULT_PORT = 6379
+SOCKET_TIMEOUT = 5
+
+
+class RedisError(Exception):
+    pass
+
+
+class RespConnection:
+    """Соединение с Redis-совместимым сервером по протоколу RESP."""
+
+    def __init__(self, host, port, db=0, timeout=SOCKET_TIMEOUT):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.reader = self.sock.makefile('rb')
+        if db:
+            self.execute('SELECT', db)
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands):
+        """Отправляет команды одним пакетом и читает все ответы."""
+        self.sock.sendall(b''.join(self.pack(args) for args in commands))
+        replies = [self.read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    @staticmethod
+    def pack(args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('Соединение с кешем закрыто')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            return RedisError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            return self.reader.read(length + 2)[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self.read_reply() for _ in range(length)]
+        raise RedisError(f'Неизвестный ответ сервера: {line!r}')
+
+
+class RedisCache(BaseCache):
+    """Бэкенд кеша для Redis и совместимых серверов.
+
+    LOCATION задаётся как redis://host:port/db. Каждый поток держит
+    своё соединение; целые числа хранятся как есть, чтобы работал
+    атомарный INCRBY, остальное — в pickle.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        url = urlparse(server)
+        self._host = url.hostname or 'localhost'
+        self._port = url.port or DEFAULT_PORT
+        self._db = int(url.path.strip('/') or 0)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = RespConnection(self._host, self._port, self._db)
+            self._local.connection = connection
+        return connection
+
+    def _pipeline(self, commands):
+        try:
+            return self._connection().pipeline(commands)
+        except (OSError, ConnectionError):
+            # Сервер мог закрыть простаивающее соединение: одна попытка
+            self._disconnect()
+            return self._connection().pipeline(commands)
+
+    def _execute(self, *args):
+        return self._pipeline([args])[0]
+
+    def _expiry(self, timeout):
+        """Время жизни в миллисекундах; None — бессрочно, 0 — уже истёк."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 0)
+
+    @staticmethod
+    def _dumps(value):
+        if type(value) is int:
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _loads(data):
+        if data is None:
+            return None
+        try:
+            return int(data)
+        except ValueError:
+            return pickle.loads(data)
+
+    def _set_command(self, key, value, timeout, *flags):
+        command = ['SET', key, self._dumps(value), *flags]
+        expiry = self._expiry(timeout)
+        if expiry is not None:
+            command += ['PX', expiry]
+        return command
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        if self._expiry(timeout) == 0:
+            return not self._execute('EXISTS', key)
+        reply = self._execute(*self._set_command(key, value, timeout, 'NX'))
+        return reply is not None
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        data = self._execute('GET', key)
+        return default if data is None else self._loads(data)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        if self._expiry(timeout) == 0:
+            self._execute('DEL', key)
+        else:
+            self._execute(*self._set_command(key, value, timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        expiry = self._expiry(timeout)
+        if expiry is None:
+            _, exists = self._pipeline([['PERSIST', key], ['EXISTS', key]])
+            return bool(exists)
+        if expiry == 0:
+            return bool(self._execute('DEL', key))
+        return bool(self._execute('PEXPIRE', key, expiry))
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._execute('DEL', key)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        made = [self.make_key(key, version=version) for key in keys]
+        for key in made:
+            self.validate_key(key)
+        values = self._execute('MGET', *made)
+        return {
+            key: self._loads(data)
+            for key, data in zip(keys, values) if data is not None
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        commands = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            if self._expiry(timeout) == 0:
+                commands.append(['DEL', key])
+            else:
+                commands.append(self._set_command(key, value, timeout))
+        if commands:
+            self._pipeline(commands)
+        return []
+
+    def delete_many(self, keys, version=None):
+        made = [self.make_key(key, version=version) for key in keys]
+        for key in made:
+            self.validate_key(key)
+        if made:
+            self._execute('DEL', *made)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self._execute('EXISTS', key))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        if not self._execute('EXISTS', key):
+            raise ValueError("Key '%s' not found" % key)
+        return self._execute('INCRBY', key, delta)
+
+    def clear(self):
+        self._execute('FLUSHDB')
+
+    def close(self, **kwargs):
+        # Django закрывает кеши после каждого запроса,
+        # а соединение с сервером переиспользуется между запросами
+        pass
+
+    def _disconnect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._local.connection = None
+            try:
+                connection.close()
+            except OSError:
+                pass
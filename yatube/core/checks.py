@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register()
+def check_perf_histogram(app_configs, **kwargs):
+    """Гистограмма PerformanceMiddleware копится в кеше, и perf_stats
+    из своего процесса видит её только в общем кеше."""
+    if settings.PERF_MIDDLEWARE and not settings.SHARED_CACHE:
+        return [Warning(
+            'Без общего кеша perf_stats не видит замеров воркеров',
+            hint='Задайте CACHE_BACKEND=file или redis',
+            id='core.W001',
+        )]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_mail_rate_limit(app_configs, **kwargs):
+    """Лимит писем на адрес и счётчики очереди писем хранятся в кеше."""
+    if (settings.EMAIL_BACKEND == 'core.mail.QueuedEmailBackend'
+            and not settings.SHARED_CACHE):
+        return [Warning(
+            'Без общего кеша EMAIL_RATE_LIMIT действует в каждом процессе '
+            'отдельно, а mail_stats не видит счётчиков воркеров',
+            hint='Задайте CACHE_BACKEND=file или redis',
+            id='core.W002',
+        )]
+    return []
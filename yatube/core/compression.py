@@ -0,0 +1,69 @@
+"""Сжатие ответов gzip и brotli.
+
+brotli — необязательная зависимость: без пакета ответы сжимаются
+только gzip.
+"""
+import gzip
+import re
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+# Уровни 4–6 brotli сжимают лучше gzip и успевают за запросом
+BROTLI_QUALITY = 5
+# Параметр q=0 в Accept-Encoding запрещает кодировку
+REFUSED = re.compile(r'q=0(\.0{0,3})?', re.IGNORECASE)
+
+
+def encodings():
+    """Доступные кодировки в порядке предпочтения."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def accepted_encodings(accept_encoding):
+    """Кодировки из заголовка Accept-Encoding, кроме запрещённых q=0."""
+    accepted = set()
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        if not REFUSED.fullmatch(params.replace(' ', '')):
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding, available=None):
+    """Лучшая кодировка из заголовка Accept-Encoding или None.
+    available — кодировки в порядке предпочтения, по умолчанию
+    те, которыми умеет сжимать процесс."""
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in available or encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает поток по частям; каждая часть отправляется клиенту
+    сразу, не дожидаясь конца ответа."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    # Формат gzip: wbits 16 + MAX_WBITS добавляет заголовок и CRC
+    compressor = zlib.compressobj(
+        GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,120 @@
+"""Удаление неиспользуемых правил CSS.
+
+Правило остаётся, если хотя бы один его селектор состоит только
+из классов и id, которые встречаются в шаблонах проекта. Селекторы
+по тегам и атрибутам не проверяются и остаются всегда, @media и
+@supports чистятся рекурсивно, остальные @-правила не трогаются.
+"""
+import os
+import re
+
+TOKEN_RE = re.compile(r'[A-Za-z_-][\w-]*')
+NAME_RE = re.compile(r'[.#](-?[A-Za-z_][\w-]*)')
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+NESTED_AT_RULES = ('@media', '@supports')
+
+
+def template_tokens(directories):
+    """Все слова из шаблонов: классы, id и всё, что на них похоже."""
+    tokens = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                with open(os.path.join(root, file), encoding='utf-8') as f:
+                    tokens.update(TOKEN_RE.findall(f.read()))
+    return tokens
+
+
+def skip_string(css, start):
+    """Индекс за закрывающей кавычкой строки, начатой в start."""
+    quote = css[start]
+    index = start + 1
+    while index < len(css) and css[index] != quote:
+        index += 2 if css[index] == '\\' else 1
+    return index + 1
+
+
+def comment_end(css, start):
+    end = css.find('*/', start + 2)
+    return len(css) if end == -1 else end + 2
+
+
+def split_rules(css):
+    """Правила верхнего уровня: пары (заголовок, тело) или (текст, None)
+    для @charset и сохраняемых комментариев /*! */."""
+    rules = []
+    depth = 0
+    start = index = 0
+    while index < len(css):
+        char = css[index]
+        if char in '"\'':
+            index = skip_string(css, index)
+            continue
+        if css.startswith('/*', index):
+            end = comment_end(css, index)
+            if depth == 0 and css.startswith('/*!', index):
+                rules.append((css[index:end], None))
+                start = end
+            index = end
+            continue
+        if char == '{':
+            if depth == 0:
+                prelude = COMMENT_RE.sub('', css[start:index]).strip()
+                body_start = index + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[body_start:index]))
+                start = index + 1
+        elif char == ';' and depth == 0:
+            statement = COMMENT_RE.sub('', css[start:index + 1]).strip()
+            rules.append((statement, None))
+            start = index + 1
+        index += 1
+    return rules
+
+
+def split_selectors(prelude):
+    selectors = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:index])
+            start = index + 1
+    selectors.append(prelude[start:])
+    return [selector.strip() for selector in selectors]
+
+
+def selector_used(selector, used):
+    # Содержимое :not(), :is() и [атрибутов] не обязано совпадать
+    plain = re.sub(r'\([^()]*\)|\[[^\]]*\]', '', selector)
+    return all(name in used for name in NAME_RE.findall(plain))
+
+
+def purge_css(css, used):
+    """Возвращает css без правил, селекторы которых не встречаются
+    среди слов used."""
+    output = []
+    for prelude, body in split_rules(css):
+        if body is None:
+            output.append(prelude)
+        elif prelude.startswith(NESTED_AT_RULES):
+            inner = purge_css(body, used)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            output.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in split_selectors(prelude)
+                if selector_used(selector, used)
+            ]
+            if selectors:
+                output.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(output)
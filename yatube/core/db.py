@@ -0,0 +1,31 @@
+"""Настройка соединений с базой.
+
+Новому соединению с SQLite выполняются PRAGMA из ключа PRAGMAS его
+настроек в DATABASES. Долгоживущие соединения (CONN_MAX_AGE) с ключом
+CONN_HEALTH_CHECKS проверяются в начале каждого запроса: оборванное
+соединение закрывается, и Django откроет новое при первом обращении.
+"""
+from django.db import connections
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS') or {}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def check_health(connection):
+    """Закрывает соединение, если база перестала на нём отвечать."""
+    if (connection.connection is None or connection.in_atomic_block
+            or not connection.settings_dict.get('CONN_HEALTH_CHECKS')):
+        return
+    if not connection.is_usable():
+        connection.close()
+
+
+def check_connections(**kwargs):
+    for connection in connections.all():
+        check_health(connection)
@@ -0,0 +1,211 @@
+"""Очередь фоновых задач в базе данных.
+
+Задачи объявляются декоратором task в модулях tasks.py приложений
+и ставятся в очередь через enqueue. Выполняет их manage.py run_workers.
+При JOBS_EAGER задача выполняется сразу в вызывающем коде — так
+проект работает без воркеров, а тесты остаются синхронными.
+"""
+import json
+import logging
+import traceback
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+Task = namedtuple('Task', ('func', 'batch', 'max_attempts', 'retry_delay'))
+
+tasks = {}
+
+
+class BatchFailed(Exception):
+    """Пакетная задача выполнила пачку не целиком.
+
+    failed — номера невыполненных элементов в списке аргументов:
+    в очередь повторно вернутся только их задачи.
+    """
+
+    def __init__(self, failed, error):
+        super().__init__(error)
+        self.failed = set(failed)
+
+
+def task(name, batch=False, max_attempts=3, retry_delay=30):
+    """Регистрирует функцию как задачу очереди.
+
+    Обычная задача вызывается с аргументами из enqueue. Пакетная
+    (batch=True) получает список словарей аргументов всех задач
+    с этим именем, захваченных воркером за один раз.
+    """
+    def decorator(func):
+        tasks[name] = Task(func, batch, max_attempts, retry_delay)
+        return func
+    return decorator
+
+
+def enqueue(name, key=None, delay=0, **payload):
+    """Ставит задачу в очередь.
+
+    Задача с уже известным ключом key повторно не ставится,
+    пока её запись хранится в таблице. Возвращает Job или None,
+    если задача выполнена сразу.
+    """
+    spec = tasks[name]
+    data = json.dumps(payload)
+    if settings.JOBS_EAGER:
+        payload = json.loads(data)
+        if spec.batch:
+            spec.func([payload])
+        else:
+            spec.func(**payload)
+        return None
+    run_at = timezone.now() + timedelta(seconds=delay)
+    if key is None:
+        return Job.objects.create(name=name, payload=data, run_at=run_at)
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                name=name, payload=data, key=key, run_at=run_at
+            )
+    except IntegrityError:
+        return Job.objects.get(key=key)
+
+
+def exhausted_attempts():
+    """Условие на задачи, у которых кончились попытки."""
+    exhausted = Q(pk__in=[])
+    for name, spec in tasks.items():
+        exhausted |= Q(name=name, attempts__gte=spec.max_attempts)
+    return exhausted
+
+
+def claim(limit, lease):
+    """Захватывает до limit готовых задач для этого воркера.
+
+    Захват — условный UPDATE по статусу: из конкурирующих воркеров
+    задачу получает только один, без блокировок строк. Задачи
+    упавшего воркера снова доступны после истечения аренды, пока
+    у них остаются попытки; иначе они помечаются невыполненными.
+    """
+    now = timezone.now()
+    expired = Q(status=Job.RUNNING, locked_until__lt=now)
+    exhausted = exhausted_attempts()
+    Job.objects.filter(expired & exhausted).update(
+        status=Job.FAILED,
+        finished=now,
+        last_error='Аренда истекла, попытки кончились',
+        locked_by='',
+        locked_until=None,
+    )
+    ready = Q(status=Job.PENDING, run_at__lte=now) | (expired & ~exhausted)
+    ids = list(Job.objects.filter(ready).order_by('run_at', 'pk').values_list(
+        'pk', flat=True
+    )[:limit])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    Job.objects.filter(ready, pk__in=ids).update(
+        status=Job.RUNNING,
+        locked_by=token,
+        locked_until=now + timedelta(seconds=lease),
+        attempts=F('attempts') + 1,
+    )
+    return list(Job.objects.filter(locked_by=token, status=Job.RUNNING))
+
+
+def run_pending(limit=None, lease=None):
+    """Захватывает и выполняет одну пачку задач, возвращает их число."""
+    jobs = claim(
+        limit or settings.JOBS_BATCH_SIZE, lease or settings.JOBS_LEASE
+    )
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.name, []).append(job)
+    for name, group in groups.items():
+        spec = tasks.get(name)
+        if spec is None:
+            fail(group, f'Неизвестная задача {name}', retry=False)
+        elif spec.batch:
+            execute(spec, group, lambda: spec.func(
+                [json.loads(job.payload) for job in group]
+            ))
+        else:
+            for job in group:
+                execute(spec, [job], lambda: spec.func(
+                    **json.loads(job.payload)
+                ))
+    return len(jobs)
+
+
+def execute(spec, jobs, call):
+    try:
+        call()
+    except BatchFailed as error:
+        logger.error('Задача %s выполнена не целиком', jobs[0].name)
+        finish([
+            job for index, job in enumerate(jobs)
+            if index not in error.failed
+        ])
+        fail(
+            [job for index, job in enumerate(jobs) if index in error.failed],
+            str(error), spec=spec,
+        )
+    except Exception:
+        logger.exception('Задача %s не выполнена', jobs[0].name)
+        fail(jobs, traceback.format_exc(), spec=spec)
+    else:
+        finish(jobs)
+
+
+def finish(jobs):
+    if not jobs:
+        return
+    # Задачи одного захвата несут один токен; задачу, чью аренду
+    # перехватил другой воркер, не трогаем
+    Job.objects.filter(
+        pk__in=[job.pk for job in jobs], locked_by=jobs[0].locked_by
+    ).update(
+        status=Job.DONE, finished=timezone.now(), last_error='',
+        locked_by='', locked_until=None,
+    )
+
+
+def fail(jobs, error, spec=None, retry=True):
+    """Возвращает задачи в очередь с растущей задержкой или, когда
+    попытки кончились, помечает их невыполненными."""
+    now = timezone.now()
+    for job in jobs:
+        if retry and job.attempts < spec.max_attempts:
+            job.status = Job.PENDING
+            job.run_at = now + timedelta(
+                seconds=spec.retry_delay * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = Job.FAILED
+            job.finished = now
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            status=job.status,
+            run_at=job.run_at,
+            finished=job.finished,
+            last_error=error,
+            locked_by='',
+            locked_until=None,
+        )
+
+
+def purge_jobs(older_than):
+    """Удаляет выполненные задачи, завершённые раньше older_than секунд
+    назад. Вместе с ними забываются и их ключи идемпотентности."""
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE,
+        finished__lt=timezone.now() - timedelta(seconds=older_than),
+    ).delete()
+    return deleted
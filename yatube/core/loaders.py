@@ -0,0 +1,55 @@
+"""Загрузчик шаблонов, который убирает из HTML лишние пробелы.
+
+Оборачивает другие загрузчики и минифицирует исходник шаблона .html
+до разбора, поэтому с кеширующим загрузчиком работа делается один раз
+на процесс, а не на каждый ответ. Отступы и пустые строки схлопываются,
+HTML-комментарии удаляются; содержимое pre, textarea, script и style
+остаётся как есть. Включается настройкой TEMPLATE_MINIFY.
+"""
+import re
+
+from django.template import Origin
+from django.template.loaders.base import Loader as BaseLoader
+
+PRESERVED_RE = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.S | re.I
+)
+COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+LINE_BREAK_RE = re.compile(r'\s*\n\s*')
+SPACES_RE = re.compile(r'[ \t]+')
+
+
+def minify_html(source):
+    parts = PRESERVED_RE.split(source)
+    output = []
+    # split с двумя группами: текст, блок целиком, имя тега, текст...
+    for index in range(0, len(parts), 3):
+        text = COMMENT_RE.sub('', parts[index])
+        text = SPACES_RE.sub(' ', LINE_BREAK_RE.sub('\n', text))
+        output.append(text)
+        if index + 1 < len(parts):
+            output.append(parts[index + 1])
+    return ''.join(output).strip()
+
+
+class MinifiedOrigin(Origin):
+    def __init__(self, source, loader):
+        super().__init__(source.name, source.template_name, loader)
+        self.source = source
+
+
+class Loader(BaseLoader):
+    def __init__(self, engine, loaders):
+        super().__init__(engine)
+        self.loaders = engine.get_template_loaders(loaders)
+
+    def get_template_sources(self, template_name):
+        for loader in self.loaders:
+            for origin in loader.get_template_sources(template_name):
+                yield MinifiedOrigin(origin, self)
+
+    def get_contents(self, origin):
+        contents = origin.source.loader.get_contents(origin.source)
+        if origin.template_name.endswith('.html'):
+            return minify_html(contents)
+        return contents
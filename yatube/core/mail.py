@@ -0,0 +1,130 @@
+"""Очередь исходящих писем.
+
+QueuedEmailBackend не отправляет письма сам, а ставит их в очередь
+core.jobs. Воркер отправляет накопившиеся письма пачкой через
+EMAIL_DELIVERY_BACKEND, открывая одно соединение на пачку. Письма,
+которые нельзя сохранить в очереди, отправляются сразу.
+"""
+import base64
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .jobs import enqueue
+from .models import Job
+
+METRICS = ('queued', 'rate_limited', 'sent', 'batches')
+
+
+def metric_key(name):
+    return f'mail:metrics:{name}'
+
+
+def count(name, delta=1):
+    """Увеличивает счётчик доставки в кеше. Общим для всех процессов
+    он будет только с общим кешем (SHARED_CACHE)."""
+    key = metric_key(name)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, None)
+
+
+def delivery_metrics():
+    values = cache.get_many([metric_key(name) for name in METRICS])
+    metrics = {name: values.get(metric_key(name), 0) for name in METRICS}
+    # Письмо, у которого кончились попытки, — невыполненная задача очереди
+    metrics['failed'] = Job.objects.filter(
+        name='core.send_emails', status=Job.FAILED
+    ).count()
+    return metrics
+
+
+def allow(recipient):
+    """Не больше EMAIL_RATE_LIMIT писем на адрес за EMAIL_RATE_PERIOD;
+    без общего кеша — в каждом процессе отдельно."""
+    key = f'mail:rate:{recipient.lower()}'
+    cache.add(key, 0, settings.EMAIL_RATE_PERIOD)
+    try:
+        return cache.incr(key) <= settings.EMAIL_RATE_LIMIT
+    except ValueError:
+        # Окно истекло между add и incr
+        return True
+
+
+def serialize_attachment(attachment):
+    filename, content, mimetype = attachment
+    if isinstance(content, bytes):
+        return [filename, base64.b64encode(content).decode(), mimetype, True]
+    return [filename, content, mimetype, False]
+
+
+def serialize(message):
+    """Письмо в виде, пригодном для JSON, или None, если в нём есть
+    вложения MIMEBase, которые в очереди не сохранить."""
+    if any(isinstance(item, MIMEBase) for item in message.attachments):
+        return None
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': [
+            serialize_attachment(item) for item in message.attachments
+        ],
+    }
+
+
+def deserialize(data):
+    attachments = [
+        (filename, base64.b64decode(content) if encoded else content,
+         mimetype)
+        for filename, content, mimetype, encoded
+        in data.get('attachments', [])
+    ]
+    return EmailMultiAlternatives(**{
+        **data,
+        'alternatives': [tuple(item) for item in data['alternatives']],
+        'attachments': attachments,
+    })
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь; адреса сверх лимита отбрасываются.
+    Письма с вложениями MIMEBase отправляются сразу."""
+
+    def send_messages(self, email_messages):
+        queued = sent = 0
+        for message in email_messages:
+            for field in ('to', 'cc', 'bcc'):
+                setattr(message, field, [
+                    address for address in getattr(message, field)
+                    if allow(address)
+                ])
+            if not message.recipients():
+                count('rate_limited')
+                continue
+            data = serialize(message)
+            if data is None:
+                sent += self.send_now(message)
+                continue
+            enqueue('core.send_emails', message=data)
+            queued += 1
+        count('queued', queued)
+        count('sent', sent)
+        return queued + sent
+
+    def send_now(self, message):
+        connection = get_connection(
+            settings.EMAIL_DELIVERY_BACKEND, fail_silently=self.fail_silently
+        )
+        return connection.send_messages([message]) or 0
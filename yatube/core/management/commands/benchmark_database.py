@@ -0,0 +1,144 @@
+import json
+import multiprocessing
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.utils import timezone
+
+from posts.management.commands.benchmark_feeds import percentile
+from posts.models import Post, User
+
+BENCHMARK_USER = 'benchmark-database'
+POSTS_ON_PAGE = 10
+
+
+def read_feed(rng, total):
+    """Читает страницу ленты, как view index."""
+    offset = rng.randrange(max(total - POSTS_ON_PAGE, 1))
+    Post.objects.count()
+    list(Post.objects.select_related('author', 'group').order_by(
+        '-pub_date'
+    )[offset:offset + POSTS_ON_PAGE])
+
+
+def work(options, author_id, total):
+    """Смесь чтений и записей одного процесса в течение --duration."""
+    rng = random.Random()
+    result = {'reads': [], 'writes': [], 'errors': 0}
+    deadline = time.monotonic() + options['duration']
+    while time.monotonic() < deadline:
+        write = rng.random() < options['write_ratio']
+        started = time.perf_counter()
+        try:
+            if write:
+                Post.objects.create(author_id=author_id, text='Замер базы')
+            else:
+                read_feed(rng, total)
+        except OperationalError:
+            # database is locked: запись не дождалась busy_timeout
+            result['errors'] += 1
+            continue
+        result['writes' if write else 'reads'].append(
+            (time.perf_counter() - started) * 1000
+        )
+    return result
+
+
+def run_process(options, author_id, total, results):
+    results.put(work(options, author_id, total))
+    connections.close_all()
+
+
+def summarize(times, duration):
+    if not times:
+        return {'ops': 0, 'per_second': 0}
+    return {
+        'ops': len(times),
+        'per_second': round(len(times) / duration, 1),
+        'mean_ms': round(statistics.mean(times), 3),
+        'p50_ms': round(percentile(times, 50), 3),
+        'p99_ms': round(percentile(times, 99), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность чтений и записей постов '
+        'из нескольких процессов, как у воркеров gunicorn'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=4,
+            help='Число процессов, 1 — в текущем процессе',
+        )
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.1,
+            help='Доля записей среди операций',
+        )
+        parser.add_argument(
+            '--no-pragmas', action='store_true',
+            help='Без PRAGMA из настроек: журнал DELETE, как по умолчанию',
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON')
+
+    def handle(self, *args, **options):
+        if options['no_pragmas'] and connection.vendor == 'sqlite':
+            connection.close()
+            connection.settings_dict['PRAGMAS'] = {'journal_mode': 'delete'}
+        author, _ = User.objects.get_or_create(username=BENCHMARK_USER)
+        total = Post.objects.count()
+        try:
+            results = self.run(options, author.pk, total)
+        finally:
+            Post.objects.filter(author=author).delete()
+            author.delete()
+        merged = {'reads': [], 'writes': [], 'errors': 0}
+        for result in results:
+            merged['reads'] += result['reads']
+            merged['writes'] += result['writes']
+            merged['errors'] += result['errors']
+        report = {
+            'meta': {
+                'date': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'pragmas': connection.settings_dict.get('PRAGMAS'),
+                'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+                'processes': options['processes'],
+                'duration': options['duration'],
+                'write_ratio': options['write_ratio'],
+            },
+            'reads': summarize(merged['reads'], options['duration']),
+            'writes': summarize(merged['writes'], options['duration']),
+            'errors': merged['errors'],
+        }
+        for name in ('reads', 'writes'):
+            self.stdout.write(f'{name}: {report[name]}')
+        self.stdout.write(f'Ошибок блокировки: {report["errors"]}')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def run(self, options, author_id, total):
+        if options['processes'] <= 1:
+            return [work(options, author_id, total)]
+        # Каждый процесс открывает своё соединение, как воркер gunicorn
+        connections.close_all()
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=run_process,
+                args=(options, author_id, total, results),
+            )
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        return collected
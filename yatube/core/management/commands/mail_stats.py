@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.mail import delivery_metrics
+
+
+class Command(BaseCommand):
+    help = 'Показывает счётчики очереди исходящих писем'
+
+    def handle(self, *args, **options):
+        if not settings.SHARED_CACHE:
+            self.stderr.write(
+                'Кеш не общий: счётчики только этого процесса, '
+                'failed — из очереди задач'
+            )
+        metrics = delivery_metrics()
+        for name, value in metrics.items():
+            self.stdout.write(f'{name}: {value}')
+        if metrics['batches']:
+            self.stdout.write(
+                f'писем на пачку: {metrics["sent"] / metrics["batches"]:.1f}'
+            )
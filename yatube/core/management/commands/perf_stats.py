@@ -0,0 +1,58 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from core import perf
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает гистограмму времени ответов по view, '
+        'которую копит PerformanceMiddleware'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести гистограмму в JSON'
+        )
+        parser.add_argument(
+            '--reset', action='store_true', help='Очистить гистограмму'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SHARED_CACHE:
+            raise CommandError(
+                'Гистограмма хранится в кеше, а locmem у каждого процесса '
+                'свой: задайте CACHE_BACKEND=file или redis'
+            )
+        perf.flush()
+        histogram = cache.get(perf.HISTOGRAM_KEY) or {}
+        if options['reset']:
+            cache.delete(perf.HISTOGRAM_KEY)
+        if options['json']:
+            self.stdout.write(json.dumps(histogram, indent=2))
+            return
+        if not histogram:
+            self.stdout.write('Замеров пока нет')
+            return
+        self.stdout.write(
+            f'{"view":<32}{"запросов":>9}{"p50":>7}{"p90":>7}{"p99":>7}'
+            f'{"sql":>8}{"шаблоны":>9}{"SQL-запр.":>10}{"байт":>9}'
+        )
+        for view_name, stats in sorted(
+                histogram.items(), key=lambda item: -item[1]['count']):
+            count = stats['count']
+            p50, p90, p99 = (
+                perf.percentile(stats, 'total', percent) or '>5000'
+                for percent in (50, 90, 99)
+            )
+            self.stdout.write(
+                f'{view_name:<32}{count:>9}{p50:>7}{p90:>7}{p99:>7}'
+                f'{stats["ms"]["sql"] / count:>8.1f}'
+                f'{stats["ms"]["template"] / count:>9.1f}'
+                f'{stats["queries"] / count:>10.1f}'
+                f'{stats["bytes"] // count:>9}'
+            )
+        self.stdout.write('Перцентили — верхние границы корзин, мс')
@@ -0,0 +1,88 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+
+from core.jobs import purge_jobs, run_pending
+
+# Как часто, в секундах, удалять старые выполненные задачи
+PURGE_EVERY = 60
+
+
+def work(options, stop):
+    processed = 0
+    purged_at = 0
+    while not stop.is_set():
+        try:
+            done = run_pending(options['batch_size'])
+            if time.monotonic() - purged_at > PURGE_EVERY:
+                purge_jobs(options['keep_done'])
+                purged_at = time.monotonic()
+        except OperationalError:
+            # Например, база SQLite занята другим воркером
+            connections.close_all()
+            done = 0
+        processed += done
+        if not done:
+            if options['once']:
+                break
+            stop.wait(options['poll_interval'])
+    return processed
+
+
+def run_process(options, stop):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(options, stop)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркеры очереди фоновых задач core.jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=2,
+            help='Число процессов-воркеров, 1 — в текущем процессе',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.JOBS_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--keep-done', type=int, default=24 * 60 * 60,
+            help='Сколько секунд хранить выполненные задачи',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и выйти',
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            stop = multiprocessing.Event()
+            processed = work(options, stop)
+            self.stdout.write(f'Выполнено задач: {processed}')
+            return
+        # Дочерние процессы открывают свои соединения с базой
+        connections.close_all()
+        stop = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(target=run_process, args=(options, stop))
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for worker in workers:
+                worker.join()
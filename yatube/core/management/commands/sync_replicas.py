@@ -0,0 +1,42 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.routers import PRIMARY
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик DATABASE_REPLICAS. '
+        'С --interval повторяет копирование, изображая отставание реплик'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Копировать раз в столько секунд, 0 — один раз',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('DATABASE_REPLICAS пуст')
+        primary = connections[PRIMARY]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Копировать можно только базу SQLite')
+        while True:
+            primary.ensure_connection()
+            for alias in settings.DATABASE_REPLICAS:
+                connections[alias].close()
+                replica = sqlite3.connect(
+                    connections[alias].settings_dict['NAME']
+                )
+                with closing(replica):
+                    primary.connection.backup(replica)
+                self.stdout.write(f'Реплика {alias} обновлена')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
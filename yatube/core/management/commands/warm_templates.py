@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_cache import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает и разбирает все шаблоны проекта: показывает время '
+        'разбора и падает на шаблонах с ошибками. Кеш шаблонов процессов '
+        'сервера прогревает yatube/wsgi.py'
+    )
+
+    def handle(self, *args, **options):
+        errors = []
+        timings = warm_templates(errors=errors)
+        if errors:
+            raise CommandError('\n'.join(errors))
+        if options['verbosity'] > 1:
+            for name, elapsed in timings.items():
+                self.stdout.write(f'{name}: {elapsed:.2f} мс')
+        state = 'включён' if settings.TEMPLATE_CACHE else 'выключен'
+        self.stdout.write(
+            f'Шаблонов загружено: {len(timings)} '
+            f'за {sum(timings.values()):.1f} мс, кеш шаблонов {state}'
+        )
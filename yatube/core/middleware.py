@@ -0,0 +1,195 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from core import perf, profiling, routers
+from core.compression import choose_encoding, compress, compress_stream
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml',
+    'image/svg+xml',
+)
+
+
+class PerformanceMiddleware:
+    """Раскладывает время ответа на middleware, SQL и шаблоны.
+
+    Отдаёт замеры в заголовке Server-Timing и копит гистограмму
+    по имени view. Включается настройкой PERF_MIDDLEWARE, стоять
+    должна первой в MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_MIDDLEWARE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        perf.instrument_templates()
+
+    def __call__(self, request):
+        sample = perf.start_sample()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample))
+                response = self.get_response(request)
+        finally:
+            perf.stop_sample()
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        response['Server-Timing'] = sample.server_timing(view_name)
+        size = 0 if response.streaming else len(response.content)
+        perf.record(view_name, sample, size)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        sample = perf.current_sample()
+        if sample is not None:
+            sample.view_started = time.perf_counter()
+
+
+class SlowRequestProfilerMiddleware:
+    """Сохраняет профиль медленных запросов к выбранным приложениям.
+
+    Стеки снимает общий для процесса сэмплер, в профиль попадают
+    адрес, пользователь и журнал SQL. Включается ненулевым
+    SLOW_REQUEST_MS.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_REQUEST_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampler = profiling.get_sampler()
+
+    def __call__(self, request):
+        queries = profiling.QueryLog()
+        self.sampler.track()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(queries))
+                response = self.get_response(request)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            stacks = self.sampler.untrack()
+        match = request.resolver_match
+        if (elapsed >= settings.SLOW_REQUEST_MS and match is not None
+                and match.namespace in settings.SLOW_REQUEST_NAMESPACES):
+            user = getattr(request, 'user', None)
+            profiling.write_profile({
+                'view': match.view_name,
+                'url': request.get_full_path(),
+                'method': request.method,
+                'status': response.status_code,
+                'user_id': user.pk if user is not None else None,
+                'ms': round(elapsed, 3),
+                'samples': sum(stacks.values()),
+                'stacks': dict(stacks.most_common()),
+                'queries': queries,
+            })
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Отправляет чтения в реплики, кроме клиентов, которые недавно писали.
+
+    После записи в основную базу клиент получает куку на
+    REPLICA_STICKY_SECONDS, и пока она жива, его чтения идут в основную
+    базу: автор сразу видит свой пост, даже если реплика отстаёт.
+    Запросы с небезопасными методами целиком работают с основной базой.
+    Включается непустым DATABASE_REPLICAS.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.start_request(
+            request.method not in SAFE_METHODS or self.is_sticky(request)
+        )
+        try:
+            with connections[routers.PRIMARY].execute_wrapper(
+                    routers.track_writes):
+                response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request()
+        if wrote:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                str(int(time.time() + settings.REPLICA_STICKY_SECONDS)),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def is_sticky(self, request):
+        try:
+            until = int(request.COOKIES[settings.REPLICA_STICKY_COOKIE])
+        except (KeyError, ValueError):
+            return False
+        return until > time.time()
+
+
+class CompressionMiddleware:
+    """Сжимает ответы gzip или brotli, если клиент их принимает.
+
+    Не сжимаются ответы меньше COMPRESSION_MIN_SIZE, нетекстовые и уже
+    сжатые. Страницы с CSRF-токеном, например формы create_post.html,
+    отдаются как есть: по длине сжатого ответа, где рядом секрет
+    и отражённый ввод, атака BREACH подбирает секрет. Включается
+    настройкой RESPONSE_COMPRESSION.
+    """
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(request, response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            content = compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Сжатое тело отличается побайтно, но равнозначно исходному
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compressible(self, request, response):
+        if (response.has_header('Content-Encoding')
+                or request.META.get('CSRF_COOKIE_USED')):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        return (
+            response.streaming
+            or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+        )
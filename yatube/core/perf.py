@@ -0,0 +1,164 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.base import Template
+
+HISTOGRAM_KEY = 'perf:histogram'
+# Верхние границы корзин гистограммы в миллисекундах
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+METRICS = ('total', 'middleware', 'sql', 'template')
+
+_local = threading.local()
+_lock = threading.Lock()
+_histogram = {}
+_flushed_at = time.monotonic()
+_original_render = None
+
+
+class RequestSample:
+    """Замеры одного запроса; заодно обёртка для execute_wrapper."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.queries = 0
+        self.ms = dict.fromkeys(METRICS, 0.0)
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.ms['sql'] += (time.perf_counter() - started) * 1000
+
+    def finish(self):
+        finished = time.perf_counter()
+        self.ms['total'] = (finished - self.started) * 1000
+        # Всё до вызова view: сессии, авторизация и прочие middleware
+        self.ms['middleware'] = (
+            (self.view_started or finished) - self.started
+        ) * 1000
+
+    def server_timing(self, view_name):
+        return ', '.join((
+            f'total;dur={self.ms["total"]:.1f};desc="{view_name}"',
+            f'middleware;dur={self.ms["middleware"]:.1f}',
+            f'sql;dur={self.ms["sql"]:.1f};desc="{self.queries} queries"',
+            f'template;dur={self.ms["template"]:.1f}',
+        ))
+
+
+def start_sample():
+    _local.sample = RequestSample()
+    return _local.sample
+
+
+def current_sample():
+    return getattr(_local, 'sample', None)
+
+
+def stop_sample():
+    sample, _local.sample = _local.sample, None
+    sample.finish()
+    return sample
+
+
+def instrument_templates():
+    """Оборачивает Template._render, чтобы мерить время шаблонов.
+
+    Учитывается только внешний шаблон: include и extends рендерятся
+    внутри него. Ленивые запросы из шаблона попадают и в sql.
+    """
+    global _original_render
+    if _original_render is not None:
+        return
+    _original_render = Template._render
+
+    def render(template, context):
+        sample = current_sample()
+        if sample is None or sample.rendering:
+            return _original_render(template, context)
+        sample.rendering = True
+        started = time.perf_counter()
+        try:
+            return _original_render(template, context)
+        finally:
+            sample.ms['template'] += (time.perf_counter() - started) * 1000
+            sample.rendering = False
+
+    Template._render = render
+
+
+def empty_stats():
+    return {
+        'count': 0,
+        'queries': 0,
+        'bytes': 0,
+        'ms': dict.fromkeys(METRICS, 0.0),
+        'buckets': {metric: [0] * (len(BUCKETS_MS) + 1)
+                    for metric in METRICS},
+    }
+
+
+def merge(histogram, other):
+    for view_name, source in other.items():
+        stats = histogram.setdefault(view_name, empty_stats())
+        for field in ('count', 'queries', 'bytes'):
+            stats[field] += source[field]
+        for metric in METRICS:
+            stats['ms'][metric] += source['ms'][metric]
+            stats['buckets'][metric] = [
+                a + b for a, b in zip(
+                    stats['buckets'][metric], source['buckets'][metric]
+                )
+            ]
+    return histogram
+
+
+def record(view_name, sample, size):
+    with _lock:
+        stats = _histogram.setdefault(view_name, empty_stats())
+        stats['count'] += 1
+        stats['queries'] += sample.queries
+        stats['bytes'] += size
+        for metric in METRICS:
+            stats['ms'][metric] += sample.ms[metric]
+            stats['buckets'][metric][
+                bisect_left(BUCKETS_MS, sample.ms[metric])
+            ] += 1
+        due = time.monotonic() - _flushed_at >= settings.PERF_FLUSH_INTERVAL
+    if due:
+        flush()
+
+
+def flush():
+    """Переносит накопленное процессом в общую гистограмму в кеше.
+
+    Чтение и запись в кеш не атомарны: при одновременном сбросе
+    из нескольких процессов часть замеров может потеряться.
+    """
+    global _histogram, _flushed_at
+    with _lock:
+        pending, _histogram = _histogram, {}
+        _flushed_at = time.monotonic()
+    if pending:
+        cache.set(
+            HISTOGRAM_KEY, merge(cache.get(HISTOGRAM_KEY) or {}, pending),
+            None,
+        )
+
+
+def percentile(stats, metric, percent):
+    """Верхняя граница корзины, в которую попадает перцентиль."""
+    rank = stats['count'] * percent / 100
+    seen = 0
+    for bound, count in zip(BUCKETS_MS + (None,), stats['buckets'][metric]):
+        seen += count
+        if count and seen >= rank:
+            return bound
+    return None
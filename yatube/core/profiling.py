@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def fold(frame):
+    """Стек кадра одной строкой от корня, как для flamegraph."""
+    names = []
+    while frame is not None:
+        names.append(
+            f'{frame.f_globals.get("__name__")}.{frame.f_code.co_name}'
+            f':{frame.f_lineno}'
+        )
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler(threading.Thread):
+    """Раз в interval секунд снимает стеки отслеживаемых потоков.
+
+    Пока запросов нет, поток спит; стоимость замера для запроса —
+    только чтение sys._current_frames(), без трассировки каждого вызова.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.interval = interval
+        self.active = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+    def track(self):
+        with self.lock:
+            self.active[threading.get_ident()] = Counter()
+        self.wakeup.set()
+
+    def untrack(self):
+        with self.lock:
+            stacks = self.active.pop(threading.get_ident())
+            if not self.active:
+                self.wakeup.clear()
+        return stacks
+
+    def run(self):
+        while True:
+            self.wakeup.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, stacks in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[fold(frame)] += 1
+
+
+def get_sampler():
+    """Один поток-сэмплер на процесс, запускается при первом вызове."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = StackSampler(settings.SLOW_REQUEST_SAMPLE_INTERVAL)
+            _sampler.start()
+    return _sampler
+
+
+class QueryLog(list):
+    """Обёртка для execute_wrapper: текст SQL и время, без параметров."""
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.append({
+                'sql': sql,
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+
+def write_profile(profile):
+    """Пишет профиль в каталог и удаляет самые старые сверх лимита."""
+    directory = settings.SLOW_REQUEST_PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = '{}-{}-{}ms.json'.format(
+        timezone.now().strftime('%Y%m%dT%H%M%S%f'),
+        profile['view'].replace(':', '-'),
+        round(profile['ms']),
+    )
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as file:
+        json.dump(profile, file, ensure_ascii=False, indent=2)
+    profiles = sorted(
+        entry for entry in os.listdir(directory) if entry.endswith('.json')
+    )
+    for old in profiles[:-settings.SLOW_REQUEST_PROFILE_KEEP]:
+        os.remove(os.path.join(directory, old))
+    return name
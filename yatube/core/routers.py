@@ -0,0 +1,72 @@
+"""Чтение из реплик и запись в основную базу.
+
+Реплики перечислены в DATABASE_REPLICAS. Читать из них разрешает
+только ReplicaRoutingMiddleware на время запроса, поэтому команды,
+воркеры очереди и тесты всегда работают с основной базой. Реплика
+выбирается одна на запрос: разные реплики отстают по-разному,
+и страница не должна собираться из данных разной свежести.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PRIMARY = 'default'
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_local = threading.local()
+
+
+def start_request(pinned):
+    """Начинает запрос; pinned — читать из основной базы."""
+    _local.replica_reads = not pinned
+    _local.replica = (
+        random.choice(settings.DATABASE_REPLICAS)
+        if settings.DATABASE_REPLICAS else PRIMARY
+    )
+    _local.wrote = False
+
+
+def finish_request():
+    """Заканчивает запрос и сообщает, была ли в нём запись."""
+    wrote = getattr(_local, 'wrote', False)
+    _local.replica_reads = False
+    _local.wrote = False
+    return wrote
+
+
+def track_writes(execute, sql, params, many, context):
+    """execute_wrapper основной базы: отмечает, что в запросе
+    действительно что-то записали, а не только выбрали базу для записи."""
+    if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        _local.wrote = True
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def use_primary():
+    """Читать из основной базы внутри блока, например сразу после записи."""
+    previous = getattr(_local, 'replica_reads', False)
+    _local.replica_reads = False
+    try:
+        yield
+    finally:
+        _local.replica_reads = previous
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if getattr(_local, 'replica_reads', False):
+            return _local.replica
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # В репликах те же данные, что и в основной базе
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
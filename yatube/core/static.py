@@ -0,0 +1,203 @@
+"""Раздача собранной статики на уровне WSGI, без Django и без
+отдельного веб-сервера.
+
+Индекс файлов STATIC_ROOT строится один раз при старте. Тело отдаётся
+через wsgi.file_wrapper: gunicorn и uWSGI передают файл в сокет через
+sendfile, не читая его в память Python. Поддерживаются If-None-Match,
+Range с одним диапазоном и сжатые копии .br и .gz от collectstatic.
+Файлы с хешем в имени кешируются браузером навсегда, остальные
+перепроверяются по ETag.
+"""
+import json
+import mimetypes
+import os
+from collections import namedtuple
+from email.utils import formatdate
+from http import HTTPStatus
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+from .compression import choose_encoding
+
+StaticFile = namedtuple(
+    'StaticFile', ('path', 'size', 'etag', 'headers', 'variants')
+)
+
+# Кодировки сжатых копий в порядке предпочтения
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+def status_line(status):
+    return f'{status.value} {status.phrase}'
+
+
+def hashed_names(root):
+    """Имена файлов с хешем содержимого из манифеста collectstatic."""
+    try:
+        with open(os.path.join(root, 'staticfiles.json')) as manifest:
+            return set(json.load(manifest)['paths'].values())
+    except (OSError, ValueError, KeyError):
+        return set()
+
+
+def file_info(path):
+    stat = os.stat(path)
+    return stat.st_size, f'"{int(stat.st_mtime):x}-{stat.st_size:x}"', stat
+
+
+def index_files(root):
+    """Словарь {имя относительно root: StaticFile} всех файлов."""
+    immutable = hashed_names(root)
+    files = {}
+    for directory, _, names in os.walk(root):
+        for filename in names:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            size, etag, stat = file_info(path)
+            content_type, _ = mimetypes.guess_type(filename)
+            cache_control = (
+                f'public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, '
+                'immutable' if name in immutable else 'no-cache'
+            )
+            variants = {}
+            for encoding, extension in ENCODINGS:
+                if os.path.exists(path + extension):
+                    variant_size, variant_etag, _ = file_info(path + extension)
+                    variants[encoding] = (
+                        path + extension, variant_size,
+                        f'{variant_etag[:-1]}-{encoding}"',
+                    )
+            files[name] = StaticFile(path, size, etag, [
+                ('Content-Type', content_type or 'application/octet-stream'),
+                ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+                ('Cache-Control', cache_control),
+            ], variants)
+    return files
+
+
+def parse_range(header, size):
+    """(начало, конец) единственного диапазона байтов, None — отдать
+    файл целиком, ValueError — диапазон за пределами файла."""
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if not first:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def choose_variant(file, environ):
+    """(путь, размер, ETag, кодировка) лучшей копии файла для клиента.
+    На запрос диапазона отдаётся несжатый файл."""
+    encoding = None
+    if not environ.get('HTTP_RANGE') and file.variants:
+        # Копии .br уже сжаты: brotli в процессе для них не нужен
+        encoding = choose_encoding(
+            environ.get('HTTP_ACCEPT_ENCODING', ''),
+            [name for name, _ in ENCODINGS if name in file.variants],
+        )
+    if encoding is not None:
+        return (*file.variants[encoding], encoding)
+    return file.path, file.size, file.etag, None
+
+
+def not_modified(environ, etag):
+    header = environ.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in tags
+
+
+class RangeFile:
+    """Файл, который читается только до конца диапазона."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class StaticFilesApp:
+    """WSGI-обёртка, которая отдаёт файлы STATIC_ROOT по STATIC_URL,
+    остальные запросы передаёт приложению."""
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = index_files(root or settings.STATIC_ROOT)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        file = (
+            self.files.get(path[len(self.prefix):])
+            if path.startswith(self.prefix) else None
+        )
+        if file is None:
+            return self.application(environ, start_response)
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response(status_line(HTTPStatus.METHOD_NOT_ALLOWED), [
+                ('Allow', 'GET, HEAD'), ('Content-Length', '0'),
+            ])
+            return []
+        return self.serve(file, environ, start_response)
+
+    def serve(self, file, environ, start_response):
+        headers = list(file.headers)
+        if file.variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+        path, size, etag, encoding = choose_variant(file, environ)
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        headers.append(('ETag', etag))
+        if not_modified(environ, etag):
+            start_response(status_line(HTTPStatus.NOT_MODIFIED), headers)
+            return []
+        byte_range = environ.get('HTTP_RANGE')
+        if environ.get('HTTP_IF_RANGE', etag) != etag:
+            byte_range = None
+        try:
+            byte_range = parse_range(byte_range, size)
+        except ValueError:
+            start_response(
+                status_line(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE),
+                [('Content-Range', f'bytes */{size}'),
+                 ('Content-Length', '0')],
+            )
+            return []
+        status, length = HTTPStatus.OK, size
+        headers.append(('Accept-Ranges', 'bytes'))
+        if byte_range is not None:
+            start, end = byte_range
+            status, length = HTTPStatus.PARTIAL_CONTENT, end - start + 1
+            headers.append(('Content-Range', f'bytes {start}-{end}/{size}'))
+        headers.append(('Content-Length', str(length)))
+        start_response(status_line(status), headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        body = open(path, 'rb')
+        if byte_range is not None:
+            body.seek(byte_range[0])
+            # Диапазон без sendfile: обёртка сервера отдала бы файл до конца
+            body = RangeFile(body, length)
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(body, BLOCK_SIZE)
@@ -0,0 +1,73 @@
+"""Хранилище статики для collectstatic.
+
+К имени файла добавляется хеш содержимого, поэтому браузеру можно
+разрешить кешировать файл навсегда. Файлы из STATIC_PURGE_CSS перед
+хешированием очищаются от правил, которые не используют шаблоны
+проекта. Для текстовых файлов рядом сохраняются сжатые копии .gz и,
+если установлен пакет brotli, .br.
+"""
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.template import engines
+
+from .css import purge_css, template_tokens
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.json', '.txt', '.xml')
+# Сжатая копия сохраняется, только если она меньше этой доли оригинала
+MAX_COMPRESSED_RATIO = 0.95
+
+
+def compress(data):
+    """Пары (расширение, сжатые данные) для доступных алгоритмов."""
+    variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    return variants
+
+
+class PipelineStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self.purge(paths)
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+        if not dry_run:
+            for hashed_name in hashed_names.values():
+                if hashed_name.endswith(COMPRESSIBLE):
+                    self.save_compressed(hashed_name)
+
+    def purge(self, paths):
+        """Урезает CSS из STATIC_PURGE_CSS; хешируется уже урезанный файл."""
+        names = [name for name in settings.STATIC_PURGE_CSS if name in paths]
+        if not names:
+            return
+        used = template_tokens(engines['django'].dirs)
+        for name in names:
+            with self.open(name) as file:
+                css = file.read().decode('utf-8')
+            self.replace(name, purge_css(css, used).encode('utf-8'))
+            paths[name] = (self, name)
+
+    def save_compressed(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        for extension, compressed in compress(data):
+            if len(compressed) < len(data) * MAX_COMPRESSED_RATIO:
+                self.replace(name + extension, compressed)
+
+    def replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self.save(name, ContentFile(content))
@@ -0,0 +1,37 @@
+import logging
+import traceback
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+from .jobs import BatchFailed, task
+from .mail import count, deserialize
+
+logger = logging.getLogger(__name__)
+
+
+@task(
+    'core.send_emails', batch=True,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS, retry_delay=60,
+)
+def send_emails(payloads):
+    """Отправляет пачку писем через одно соединение. Неотправленные
+    письма очередь повторяет по одному, чтобы повтор не отправил
+    остальные письма пачки дважды."""
+    sent = 0
+    failed = []
+    error = ''
+    with get_connection(settings.EMAIL_DELIVERY_BACKEND) as connection:
+        for index, payload in enumerate(payloads):
+            try:
+                sent += connection.send_messages(
+                    [deserialize(payload['message'])]
+                ) or 0
+            except Exception:
+                logger.exception('Письмо не отправлено')
+                failed.append(index)
+                error = traceback.format_exc()
+    count('batches')
+    count('sent', sent)
+    if failed:
+        raise BatchFailed(failed, error)
@@ -0,0 +1,42 @@
+"""Прогрев кеша шаблонов.
+
+С кеширующим загрузчиком (TEMPLATE_CACHE) шаблон читается с диска
+и разбирается при первом обращении в каждом процессе. warm_templates
+делает это для всех шаблонов проекта при старте, чтобы первые запросы
+к страницам не платили за разбор.
+"""
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+
+
+def project_templates(engine):
+    """Имена всех шаблонов из каталогов DIRS движка."""
+    names = set()
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                path = os.path.relpath(os.path.join(root, file), directory)
+                names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_templates(using='django', errors=None):
+    """Загружает все шаблоны проекта, возвращает время загрузки
+    каждого в миллисекундах. Если передан список errors, ошибки
+    в шаблонах складываются в него строками «имя: ошибка», иначе
+    не перехватываются."""
+    engine = engines[using]
+    timings = {}
+    for name in project_templates(engine):
+        started = time.perf_counter()
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as error:
+            if errors is None:
+                raise
+            errors.append(f'{name}: {error}')
+            continue
+        timings[name] = (time.perf_counter() - started) * 1000
+    return timings
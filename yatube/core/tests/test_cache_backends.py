@@ -0,0 +1,179 @@
+import socketserver
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache_backends import RedisCache
+
+
+class RespStandInHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.server.execute(args))
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """Локальный сервер, понимающий нужное кешу подмножество Redis."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), RespStandInHandler)
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def reply(value):
+        if value is None:
+            return b'$-1\r\n'
+        if isinstance(value, int):
+            return b':%d\r\n' % value
+        if isinstance(value, list):
+            return b'*%d\r\n' % len(value) + b''.join(
+                RespStandIn.reply(item) for item in value
+            )
+        if isinstance(value, str):
+            return b'+%s\r\n' % value.encode()
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+
+    def alive(self, key):
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def execute(self, args):
+        command, *args = args
+        with self.lock:
+            try:
+                return self.reply(
+                    getattr(self, 'do_' + command.decode().lower())(*args)
+                )
+            except (AttributeError, ValueError) as error:
+                return b'-ERR %s\r\n' % str(error).encode()
+
+    def do_select(self, db):
+        return 'OK'
+
+    def do_set(self, key, value, *flags):
+        flags = [flag.decode().upper() for flag in flags]
+        if 'NX' in flags and self.alive(key):
+            return None
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if 'PX' in flags:
+            milliseconds = int(flags[flags.index('PX') + 1])
+            self.expires[key] = time.monotonic() + milliseconds / 1000
+        return 'OK'
+
+    def do_get(self, key):
+        return self.data[key] if self.alive(key) else None
+
+    def do_mget(self, *keys):
+        return [self.do_get(key) for key in keys]
+
+    def do_del(self, *keys):
+        deleted = [key for key in keys if self.alive(key)]
+        for key in deleted:
+            del self.data[key]
+            self.expires.pop(key, None)
+        return len(deleted)
+
+    def do_exists(self, key):
+        return int(self.alive(key))
+
+    def do_incrby(self, key, delta):
+        value = int(self.data[key]) + int(delta)
+        self.data[key] = str(value).encode()
+        return value
+
+    def do_pexpire(self, key, milliseconds):
+        if not self.alive(key):
+            return 0
+        self.expires[key] = time.monotonic() + int(milliseconds) / 1000
+        return 1
+
+    def do_persist(self, key):
+        return int(self.expires.pop(key, None) is not None)
+
+    def do_flushdb(self):
+        self.data.clear()
+        self.expires.clear()
+        return 'OK'
+
+
+class RedisCacheTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = RespStandIn()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.location = 'redis://127.0.0.1:%d/1' % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache = RedisCache(self.location, {'KEY_PREFIX': 'yatube'})
+        self.cache.clear()
+
+    def test_set_get_delete(self):
+        self.cache.set('post', {'text': 'Тестовый пост', 'id': 1})
+        self.assertEqual(
+            self.cache.get('post'), {'text': 'Тестовый пост', 'id': 1}
+        )
+        self.cache.delete('post')
+        self.assertIsNone(self.cache.get('post'))
+        self.assertEqual(self.cache.get('post', 'нет'), 'нет')
+
+    def test_keys_use_prefix_and_version(self):
+        self.cache.set('count', 10)
+        self.assertIn(b'yatube:1:count', self.server.data)
+        deployed = RedisCache(
+            self.location, {'KEY_PREFIX': 'yatube', 'VERSION': 2}
+        )
+        self.assertIsNone(deployed.get('count'))
+
+    def test_add_keeps_existing_value(self):
+        self.assertTrue(self.cache.add('key', 'first'))
+        self.assertFalse(self.cache.add('key', 'second'))
+        self.assertEqual(self.cache.get('key'), 'first')
+
+    def test_many(self):
+        self.cache.set_many({'a': 1, 'b': [2], 'c': 'три'})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'missing']), {'a': 1, 'b': [2]}
+        )
+        self.cache.delete_many(['a', 'b'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'c': 'три'})
+
+    def test_incr(self):
+        self.cache.set('hits', 1)
+        self.assertEqual(self.cache.incr('hits', 5), 6)
+        self.assertEqual(self.cache.get('hits'), 6)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_timeouts(self):
+        self.cache.set('short', 'value', 0.05)
+        self.cache.set('forever', 'value', None)
+        self.cache.set('expired', 'value', 0)
+        self.assertIsNone(self.cache.get('expired'))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertEqual(self.cache.get('forever'), 'value')
+        self.assertTrue(self.cache.touch('forever', 0.05))
+        time.sleep(0.1)
+        self.assertFalse(self.cache.has_key('forever'))
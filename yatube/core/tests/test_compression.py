@@ -0,0 +1,97 @@
+import gzip
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.compression import choose_encoding
+from core.loaders import minify_html
+from core.middleware import CompressionMiddleware
+from posts.management.commands.benchmark_compression import (
+    templates_settings)
+from posts.models import User
+
+PAGE = '<p>' + 'Лев Толстой ' * 100 + '</p>'
+
+
+class CompressionMiddlewareTest(TestCase):
+    def middleware(self, response):
+        return CompressionMiddleware(lambda request: response)
+
+    def get(self, response, **headers):
+        request = RequestFactory().get('/', **headers)
+        return self.middleware(response)(request)
+
+    def test_page_gzipped(self):
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        plain = self.client.get(reverse('posts:index'))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_csrf_form_not_compressed(self):
+        self.client.force_login(User.objects.create_user(username='Author'))
+        response = self.client.get(
+            reverse('posts:post_create'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_response_not_compressed(self):
+        response = self.get(HttpResponse('<p>Пост</p>'),
+                            HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_etag_weakened(self):
+        page = HttpResponse(PAGE)
+        page['ETag'] = '"index"'
+        response = self.get(page, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['ETag'], 'W/"index"')
+
+    def test_streaming_response(self):
+        chunks = [PAGE.encode()] * 3
+        response = self.get(
+            StreamingHttpResponse(iter(chunks)), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            b''.join(chunks),
+        )
+
+    @mock.patch('core.compression.brotli', None)
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('br, gzip;q=0.5'), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0, identity'))
+        self.assertIsNone(choose_encoding('GZIP; Q=0.000'))
+        self.assertEqual(choose_encoding('br', ['br', 'gzip']), 'br')
+        self.assertIsNone(choose_encoding(''))
+
+
+class MinifyTest(TestCase):
+    def test_minify_html(self):
+        source = (
+            '<div>\n    <!-- комментарий -->\n    <p>Текст   поста</p>\n\n'
+            '    <pre>  код\n    отступ</pre>\n</div>\n'
+        )
+        self.assertEqual(
+            minify_html(source),
+            '<div>\n<p>Текст поста</p>\n<pre>  код\n    отступ</pre>\n</div>',
+        )
+
+    @override_settings(TEMPLATES=templates_settings(minify=True))
+    def test_minified_page(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('\n  ', response.content.decode())
+        self.assertNotIn('<!--', response.content.decode())
+
+    def test_benchmark_compression_command(self):
+        out = StringIO()
+        call_command('benchmark_compression', '--depths', '1', stdout=out)
+        self.assertIn("'minified_gzip_bytes'", out.getvalue())
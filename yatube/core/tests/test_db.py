@@ -0,0 +1,71 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase
+
+from core.db import check_health
+from posts.models import Post, User
+
+
+class SQLiteConnectionTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.connection = ConnectionHandler({'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory.name, 'db.sqlite3'),
+            'CONN_HEALTH_CHECKS': True,
+            'PRAGMAS': {
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'busy_timeout': 5000,
+            },
+        }})['default']
+        self.addCleanup(self.connection.close)
+
+    def pragma(self, name):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        # 1 — NORMAL
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+
+    def test_broken_connection_closed(self):
+        self.connection.ensure_connection()
+        check_health(self.connection)
+        self.assertIsNotNone(self.connection.connection)
+        with mock.patch.object(
+            self.connection, 'is_usable', return_value=False
+        ):
+            check_health(self.connection)
+        self.assertIsNone(self.connection.connection)
+
+
+class BenchmarkDatabaseTest(TestCase):
+    def test_benchmark_cleans_up(self):
+        author = User.objects.create_user(username='Author')
+        Post.objects.create(author=author, text='Пост')
+        out = StringIO()
+        call_command(
+            'benchmark_database', '--processes', '1', '--duration', '0.2',
+            '--write-ratio', '0.5', stdout=out,
+        )
+        self.assertIn('reads:', out.getvalue())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(
+            User.objects.filter(username='benchmark-database').exists()
+        )
+
+    def test_test_database_configured(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
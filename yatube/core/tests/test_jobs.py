@@ -0,0 +1,131 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.jobs import claim, enqueue, execute, run_pending, task, tasks
+from core.models import Job
+from posts.models import Post, User
+from posts.search import SearchResults
+
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.record_batch', batch=True)
+def record_batch(payloads):
+    calls.append(sorted(payload['value'] for payload in payloads))
+
+
+@task('tests.broken', max_attempts=2, retry_delay=60)
+def broken():
+    raise ValueError('Сломано')
+
+
+@override_settings(JOBS_EAGER=False)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_runs_at_once(self):
+        self.assertIsNone(enqueue('tests.record', value=1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_worker_runs_job(self):
+        job = enqueue('tests.record', value=1)
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_idempotency_key(self):
+        first = enqueue('tests.record', key='once', value=1)
+        second = enqueue('tests.record', key='once', value=2)
+        self.assertEqual(first.pk, second.pk)
+        run_pending()
+        self.assertEqual(calls, [1])
+
+    def test_batch_task_called_once(self):
+        for value in (3, 1, 2):
+            enqueue('tests.record_batch', value=value)
+        run_pending()
+        self.assertEqual(calls, [[1, 2, 3]])
+
+    def test_retry_then_fail(self):
+        job = enqueue('tests.broken')
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Сломано', job.last_error)
+        self.assertEqual(run_pending(), 0)
+        Job.objects.update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_expired_lease_reclaimed(self):
+        job = enqueue('tests.record', value=1)
+        Job.objects.update(
+            status=Job.RUNNING,
+            locked_by='lost',
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(calls, [1])
+
+    def test_expired_lease_without_attempts_fails(self):
+        job = enqueue('tests.broken')
+        Job.objects.update(
+            status=Job.RUNNING,
+            attempts=2,
+            locked_by='lost',
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(run_pending(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_stale_worker_keeps_off_reclaimed_job(self):
+        enqueue('tests.record', value=1)
+        [stale] = claim(limit=1, lease=60)
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        [current] = claim(limit=1, lease=60)
+        execute(tasks['tests.record'], [stale], lambda: None)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.locked_by, current.locked_by)
+
+    def test_run_workers_command(self):
+        for value in range(3):
+            enqueue('tests.record', value=value)
+        out = StringIO()
+        call_command(
+            'run_workers', '--once', '--processes', '1', stdout=out
+        )
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertIn('Выполнено задач: 3', out.getvalue())
+
+    def test_post_side_effects_queued(self):
+        user = User.objects.create_user(username='Author')
+        Post.objects.create(author=user, text='Поезд ушёл')
+        self.assertEqual(len(SearchResults('поезд')), 0)
+        self.assertEqual(
+            set(Job.objects.values_list('name', flat=True)),
+            {'posts.reindex', 'posts.fan_out'},
+        )
+        run_pending()
+        self.assertEqual(len(SearchResults('поезд')), 1)
@@ -0,0 +1,170 @@
+import socketserver
+import threading
+from email.mime.text import MIMEText
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, send_mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.checks import check_mail_rate_limit
+from core.jobs import run_pending
+from core.mail import delivery_metrics
+from core.models import Job
+from posts.models import User
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    def reply(self, code, text):
+        self.wfile.write(f'{code} {text}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply(220, 'stand-in')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().split(' ', 1)[0].strip().upper()
+            if command == 'DATA':
+                self.reply(354, 'end with .')
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if line in (b'.\r\n', b''):
+                        break
+                    lines.append(line)
+                self.server.messages.append(b''.join(lines).decode())
+                self.reply(250, 'OK')
+            elif command == 'RCPT' and b'refused' in line:
+                self.reply(550, 'no such user')
+            elif command == 'QUIT':
+                self.reply(221, 'bye')
+                return
+            else:
+                self.reply(250, 'OK')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Локальный SMTP-сервер, который запоминает принятые письма."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPStandInHandler)
+        self.connections = 0
+        self.messages = []
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_HOST='127.0.0.1',
+    EMAIL_RATE_LIMIT=2,
+    JOBS_EAGER=False,
+)
+class QueuedEmailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = SMTPStandIn()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.server.connections = 0
+        self.server.messages = []
+        port = self.settings(EMAIL_PORT=self.server.server_address[1])
+        port.enable()
+        self.addCleanup(port.disable)
+
+    def test_password_reset_queued(self):
+        User.objects.create_user(
+            username='Reader', email='reader@ya.tube', password='Ytr5-pass'
+        )
+        self.client.post(
+            reverse('users:password_reset_form'), {'email': 'reader@ya.tube'}
+        )
+        self.assertEqual(self.server.connections, 0)
+        self.assertTrue(Job.objects.filter(name='core.send_emails').exists())
+        run_pending()
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertIn('reader@ya.tube', self.server.messages[0])
+
+    def test_batch_uses_one_connection(self):
+        for i in range(3):
+            send_mail('Тема', 'Текст', None, [f'user{i}@ya.tube'])
+        run_pending()
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.messages), 3)
+        metrics = delivery_metrics()
+        self.assertEqual(metrics['sent'], 3)
+        self.assertEqual(metrics['batches'], 1)
+
+    def test_rate_limit_per_recipient(self):
+        for _ in range(3):
+            send_mail('Тема', 'Текст', None, ['reader@ya.tube'])
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(delivery_metrics()['rate_limited'], 1)
+
+    def test_failed_message_requeued_alone(self):
+        send_mail('Тема', 'Текст', None, ['reader@ya.tube'])
+        send_mail('Тема', 'Текст', None, ['refused@ya.tube'])
+        run_pending()
+        self.assertEqual(len(self.server.messages), 1)
+        retry = Job.objects.get(status=Job.PENDING)
+        self.assertIn('refused@ya.tube', retry.payload)
+        self.assertGreater(retry.run_at, timezone.now())
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 1)
+
+    def test_failed_message_counted(self):
+        send_mail('Тема', 'Текст', None, ['refused@ya.tube'])
+        for _ in range(settings.EMAIL_MAX_ATTEMPTS):
+            Job.objects.update(run_at=timezone.now())
+            run_pending()
+        self.assertFalse(Job.objects.filter(status=Job.PENDING).exists())
+        self.assertEqual(delivery_metrics()['failed'], 1)
+
+    def test_attachments_queued(self):
+        message = EmailMessage('Тема', 'Текст', None, ['reader@ya.tube'])
+        message.attach('notes.txt', 'Заметки', 'text/plain')
+        message.attach('data.bin', b'\x00\x01binary', 'application/x-bin')
+        message.send()
+        self.assertEqual(self.server.connections, 0)
+        run_pending()
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertIn('notes.txt', self.server.messages[0])
+        self.assertIn('AAFiaW5hcnk=', self.server.messages[0])
+
+    def test_mime_attachment_sent_directly(self):
+        message = EmailMessage('Тема', 'Текст', None, ['reader@ya.tube'])
+        message.attach(MIMEText('Заметки'))
+        message.send()
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertFalse(Job.objects.exists())
+
+    def test_mail_stats_command(self):
+        send_mail('Тема', 'Текст', None, ['reader@ya.tube'])
+        out, err = StringIO(), StringIO()
+        with self.settings(SHARED_CACHE=True):
+            call_command('mail_stats', stdout=out, stderr=err)
+        self.assertIn('queued: 1', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+
+    def test_mail_counters_need_shared_cache(self):
+        err = StringIO()
+        call_command('mail_stats', stdout=StringIO(), stderr=err)
+        self.assertIn('Кеш не общий', err.getvalue())
+        self.assertEqual(
+            [warning.id for warning in check_mail_rate_limit(None)],
+            ['core.W002'],
+        )
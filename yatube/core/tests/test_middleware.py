@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import perf
+from core.checks import check_perf_histogram
+from posts.models import Post, User
+
+
+@override_settings(PERF_MIDDLEWARE=True, PERF_FLUSH_INTERVAL=3600)
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        perf.flush()
+        cache.clear()
+        self.client = Client()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for metric in perf.METRICS:
+            with self.subTest(metric=metric):
+                self.assertIn(f'{metric};dur=', timing)
+        self.assertIn('desc="posts:index"', timing)
+
+    def test_histogram_by_view_name(self):
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        perf.flush()
+        histogram = cache.get(perf.HISTOGRAM_KEY)
+        self.assertEqual(histogram['posts:index']['count'], 3)
+        self.assertEqual(histogram['posts:post_detail']['count'], 1)
+        self.assertGreater(histogram['posts:index']['queries'], 0)
+        self.assertGreater(histogram['posts:index']['ms']['template'], 0)
+        self.assertEqual(
+            sum(histogram['posts:index']['buckets']['total']), 3
+        )
+
+    @override_settings(SHARED_CACHE=True)
+    def test_perf_stats_command(self):
+        self.client.get(reverse('posts:index'))
+        out = StringIO()
+        call_command('perf_stats', '--reset', stdout=out)
+        self.assertIn('posts:index', out.getvalue())
+        self.assertIsNone(cache.get(perf.HISTOGRAM_KEY))
+
+    def test_perf_stats_needs_shared_cache(self):
+        with self.assertRaises(CommandError):
+            call_command('perf_stats', stdout=StringIO())
+        self.assertEqual(
+            [warning.id for warning in check_perf_histogram(None)],
+            ['core.W001'],
+        )
+
+    @override_settings(PERF_MIDDLEWARE=False)
+    def test_disabled_by_default(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+PROFILE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    SLOW_REQUEST_MS=0.001,
+    SLOW_REQUEST_PROFILE_DIR=PROFILE_DIR,
+    SLOW_REQUEST_PROFILE_KEEP=3,
+    SLOW_REQUEST_SAMPLE_INTERVAL=0.001,
+)
+class SlowRequestProfilerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(PROFILE_DIR, ignore_errors=True)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def profiles(self):
+        if not os.path.isdir(PROFILE_DIR):
+            return []
+        return sorted(os.listdir(PROFILE_DIR))
+
+    def test_slow_request_profiled(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        self.client.get(url)
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 1)
+        with open(os.path.join(PROFILE_DIR, profiles[0])) as file:
+            profile = json.load(file)
+        self.assertEqual(profile['view'], 'posts:post_detail')
+        self.assertEqual(profile['url'], url)
+        self.assertEqual(profile['user_id'], self.user.pk)
+        self.assertIn('posts_post', profile['queries'][-1]['sql'])
+        self.assertIsInstance(profile['stacks'], dict)
+
+    def test_other_apps_not_profiled(self):
+        self.client.get(reverse('users:login'))
+        self.assertEqual(self.profiles(), [])
+
+    def test_profiles_rotated(self):
+        for _ in range(5):
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(len(self.profiles()), 3)
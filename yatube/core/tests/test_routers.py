@@ -0,0 +1,107 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import routers
+from posts.models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.addCleanup(routers.finish_request)
+
+    def test_primary_outside_request(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_replica_inside_request(self):
+        routers.start_request(pinned=False)
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        with routers.use_primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_pinned_request(self):
+        routers.start_request(pinned=True)
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica', 'other', 'third'])
+    def test_one_replica_per_request(self):
+        routers.start_request(pinned=False)
+        replicas = {self.router.db_for_read(Post) for _ in range(20)}
+        self.assertEqual(len(replicas), 1)
+
+    def test_write_goes_to_primary(self):
+        routers.start_request(pinned=False)
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(routers.finish_request())
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    def test_only_real_write_sticks(self):
+        user = User.objects.create_user(username='Writer')
+        with connection.execute_wrapper(routers.track_writes):
+            routers.start_request(pinned=False)
+            list(Post.objects.all())
+            self.assertFalse(routers.finish_request())
+            routers.start_request(pinned=False)
+            Post.objects.create(text='Пост', author=user)
+            self.assertTrue(routers.finish_request())
+
+    def test_migrate_primary_only(self):
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+
+# Реплика указывает на ту же тестовую базу, проверяется выбор пути
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRoutingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Author')
+
+    def get_pinned(self, client, url, method='get', **kwargs):
+        with mock.patch(
+            'core.routers.start_request', wraps=routers.start_request
+        ) as start:
+            response = getattr(client, method)(url, **kwargs)
+        return start.call_args[0][0], response
+
+    def test_anonymous_reads_replica(self):
+        pinned, response = self.get_pinned(self.client, reverse('posts:index'))
+        self.assertFalse(pinned)
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+    def test_author_sees_own_post(self):
+        self.client.force_login(self.user)
+        pinned, response = self.get_pinned(
+            self.client, reverse('posts:post_create'), 'post',
+            data={'text': 'Свежий пост'},
+        )
+        self.assertTrue(pinned)
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+        pinned, response = self.get_pinned(
+            self.client, reverse('posts:profile', args=['Author'])
+        )
+        self.assertTrue(pinned)
+        self.assertContains(response, 'Свежий пост')
+
+    def test_post_without_write_not_sticky(self):
+        self.client.force_login(self.user)
+        pinned, response = self.get_pinned(
+            self.client, reverse('posts:post_create'), 'post',
+            data={'text': ''},
+        )
+        self.assertTrue(pinned)
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+    def test_sticky_window_expires(self):
+        self.client.cookies[settings.REPLICA_STICKY_COOKIE] = str(
+            int(time.time()) - 1
+        )
+        pinned, _ = self.get_pinned(self.client, reverse('posts:index'))
+        self.assertFalse(pinned)
@@ -0,0 +1,149 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from wsgiref.util import FileWrapper, setup_testing_defaults
+
+from django.test import SimpleTestCase
+
+from core.static import RangeFile, StaticFilesApp
+
+CSS = b'body{margin:0}' * 100
+
+
+def django_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/html')])
+    return [b'django']
+
+
+class StaticFilesAppTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(cls.root, 'css'))
+        files = {
+            'css/site.0123456789ab.css': CSS,
+            'css/site.0123456789ab.css.gz': gzip.compress(CSS),
+            'css/site.css': CSS,
+            'staticfiles.json': json.dumps({'paths': {
+                'css/site.css': 'css/site.0123456789ab.css',
+            }}).encode(),
+        }
+        for name, content in files.items():
+            with open(os.path.join(cls.root, name), 'wb') as file:
+                file.write(content)
+        cls.app = StaticFilesApp(django_app, cls.root, '/static/')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def request(self, path, method='GET', **headers):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': method, **headers}
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = self.app(environ, start_response)
+        response['body'] = b''.join(body)
+        if hasattr(body, 'close'):
+            body.close()
+        response['iterable'] = body
+        return response
+
+    def test_hashed_file_cached_forever(self):
+        response = self.request('/static/css/site.0123456789ab.css')
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(response['body'], CSS)
+        headers = response['headers']
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertEqual(headers['Content-Length'], str(len(CSS)))
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertIsInstance(response['iterable'], FileWrapper)
+
+    def test_unhashed_file_revalidated(self):
+        response = self.request('/static/css/site.css')
+        self.assertEqual(response['headers']['Cache-Control'], 'no-cache')
+
+    def test_precompressed_variant(self):
+        response = self.request(
+            '/static/css/site.0123456789ab.css',
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response['body']), CSS)
+        plain = self.request('/static/css/site.0123456789ab.css')
+        self.assertNotEqual(
+            response['headers']['ETag'], plain['headers']['ETag']
+        )
+
+    def test_refused_encoding_not_sent(self):
+        for header in ('gzip;q=0', 'gzip; q=0.000, identity', 'br'):
+            with self.subTest(header=header):
+                response = self.request(
+                    '/static/css/site.0123456789ab.css',
+                    HTTP_ACCEPT_ENCODING=header,
+                )
+                self.assertNotIn('Content-Encoding', response['headers'])
+                self.assertEqual(response['body'], CSS)
+
+    def test_if_none_match(self):
+        etag = self.request('/static/css/site.css')['headers']['ETag']
+        response = self.request(
+            '/static/css/site.css', HTTP_IF_NONE_MATCH=f'"other", {etag}'
+        )
+        self.assertEqual(response['status'], '304 Not Modified')
+        self.assertEqual(response['body'], b'')
+
+    def test_range(self):
+        response = self.request(
+            '/static/css/site.css', HTTP_RANGE='bytes=4-13',
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response['status'], '206 Partial Content')
+        self.assertEqual(response['body'], CSS[4:14])
+        self.assertEqual(
+            response['headers']['Content-Range'], f'bytes 4-13/{len(CSS)}'
+        )
+        self.assertNotIn('Content-Encoding', response['headers'])
+        self.assertIsInstance(response['iterable'].filelike, RangeFile)
+        suffix = self.request('/static/css/site.css', HTTP_RANGE='bytes=-5')
+        self.assertEqual(suffix['body'], CSS[-5:])
+
+    def test_range_not_satisfiable(self):
+        response = self.request(
+            '/static/css/site.css', HTTP_RANGE=f'bytes={len(CSS)}-'
+        )
+        self.assertEqual(
+            response['status'], '416 Requested Range Not Satisfiable'
+        )
+        self.assertEqual(
+            response['headers']['Content-Range'], f'bytes */{len(CSS)}'
+        )
+
+    def test_stale_if_range_returns_whole_file(self):
+        response = self.request(
+            '/static/css/site.css', HTTP_RANGE='bytes=0-1',
+            HTTP_IF_RANGE='"old"',
+        )
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(response['body'], CSS)
+
+    def test_head_and_methods(self):
+        response = self.request('/static/css/site.css', 'HEAD')
+        self.assertEqual(response['body'], b'')
+        self.assertEqual(response['headers']['Content-Length'], str(len(CSS)))
+        response = self.request('/static/css/site.css', 'POST')
+        self.assertEqual(response['status'], '405 Method Not Allowed')
+
+    def test_other_paths_passed_to_django(self):
+        for path in ('/', '/static/missing.css'):
+            with self.subTest(path=path):
+                self.assertEqual(self.request(path)['body'], b'django')
@@ -0,0 +1,72 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.css import purge_css
+
+CSS = (
+    '@charset "UTF-8";/*! лицензия */:root{--bs-blue:#0d6efd}'
+    'body{margin:0}.nav,.carousel{display:flex}.carousel-item{float:left}'
+    '.nav:not(.active){color:red}a[href^="{"]{color:blue}'
+    '@media (min-width:576px){.container{max-width:540px}.modal{top:0}}'
+    '@media print{.modal{display:none}}'
+    '@keyframes spin{to{transform:rotate(360deg)}}'
+    '/*# sourceMappingURL=bootstrap.min.css.map */'
+)
+
+
+class PurgeCSSTest(SimpleTestCase):
+    def test_unused_rules_removed(self):
+        self.assertEqual(
+            purge_css(CSS, {'nav', 'container'}),
+            '@charset "UTF-8";/*! лицензия */:root{--bs-blue:#0d6efd}'
+            'body{margin:0}.nav{display:flex}'
+            '.nav:not(.active){color:red}a[href^="{"]{color:blue}'
+            '@media (min-width:576px){.container{max-width:540px}}'
+            '@keyframes spin{to{transform:rotate(360deg)}}',
+        )
+
+
+class PipelineStorageTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.override = override_settings(
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE='core.storage.PipelineStaticFilesStorage',
+        )
+        cls.override.enable()
+        call_command('collectstatic', '--noinput', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.override.disable()
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def test_css_hashed_purged_and_compressed(self):
+        name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        self.assertRegex(name, r'^css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.root, name)
+        source = os.path.join(
+            settings.STATICFILES_DIRS[0], 'css', 'bootstrap.min.css'
+        )
+        self.assertLess(os.path.getsize(path), os.path.getsize(source) / 2)
+        with open(path, 'rb') as css:
+            content = css.read()
+        self.assertIn(b'.navbar', content)
+        self.assertNotIn(b'.carousel', content)
+        with gzip.open(path + '.gz') as compressed:
+            self.assertEqual(compressed.read(), content)
+
+    def test_images_not_compressed(self):
+        name = staticfiles_storage.stored_name('img/logo.png')
+        self.assertTrue(os.path.exists(os.path.join(self.root, name)))
+        self.assertFalse(os.path.exists(os.path.join(self.root, name + '.gz')))
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.template import engines
+from django.template.base import Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.template_cache import project_templates, warm_templates
+from posts.management.commands.benchmark_templates import templates_settings
+
+
+@override_settings(TEMPLATES=templates_settings(cached=True))
+class TemplateCacheTest(TestCase):
+    def test_all_project_templates_warmed(self):
+        timings = warm_templates()
+        self.assertIn('posts/includes/paginator.html', timings)
+        self.assertEqual(
+            list(timings), project_templates(engines['django'])
+        )
+
+    def test_warm_page_not_parsed_again(self):
+        warm_templates()
+        cache.clear()
+        with mock.patch.object(
+            Template, 'compile_nodelist', autospec=True
+        ) as compile_nodelist:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        compile_nodelist.assert_not_called()
+
+    def test_warm_templates_command(self):
+        out = StringIO()
+        call_command('warm_templates', stdout=out)
+        self.assertIn('Шаблонов загружено', out.getvalue())
+
+    def test_broken_templates_collected(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'broken.html'), 'w') as file:
+            file.write('{% if %}')
+        templates = templates_settings(cached=True)
+        templates[0]['DIRS'] = [*templates[0]['DIRS'], directory]
+        with self.settings(TEMPLATES=templates):
+            errors = []
+            timings = warm_templates(errors=errors)
+            self.assertNotIn('broken.html', timings)
+            self.assertEqual(len(errors), 1)
+            self.assertTrue(errors[0].startswith('broken.html: '))
+            with self.assertRaisesMessage(CommandError, 'broken.html'):
+                call_command('warm_templates', stdout=StringIO())
+
+    def test_benchmark_templates_command(self):
+        out = StringIO()
+        call_command('benchmark_templates', '--requests', '1', stdout=out)
+        self.assertIn(
+            "кеш шаблонов posts:index?page=1: {'p50_ms'", out.getvalue()
+        )
+        self.assertIn("'parsed_per_request': 0.0}", out.getvalue())
@@ -4,5 +4,8 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     name = 'posts'
 
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
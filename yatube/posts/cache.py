@@ -0,0 +1,225 @@
+import hashlib
+import json
+import uuid
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+
+from .models import Follow, Group, Post, User
+
+# Попадания и промахи кеша страниц в этом процессе
+page_cache_stats = Counter()
+# Счётчик сбросов тегов: по нему видно, была ли запись во время рендера
+WRITES_KEY = 'posts:tag-writes'
+
+
+def tag_key(tag):
+    return f'posts:tag:{tag}'
+
+
+def feed_tags(*feeds):
+    """Теги авторов и групп для пар (author_id, group_id) постов."""
+    tags = set()
+    for author_id, group_id in feeds:
+        tags.add(f'author:{author_id}')
+        if group_id is not None:
+            tags.add(f'group:{group_id}')
+    return tags
+
+
+def post_tags(*posts):
+    """Теги авторов и групп, чьи данные видны в карточках постов."""
+    return feed_tags(*((post.author_id, post.group_id) for post in posts))
+
+
+def tag_response(response, *tags):
+    """Отмечает, от каких объектов зависит страница."""
+    response.cache_tags = set(tags)
+    return response
+
+
+def delete_keys(keys):
+    """Удаляет ключи кеша сразу, а внутри транзакции ещё и после коммита:
+    иначе читатель успеет закешировать данные, которые видел до коммита."""
+    keys = list(keys)
+    cache.delete_many(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def count_write():
+    try:
+        cache.incr(WRITES_KEY)
+    except ValueError:
+        cache.add(WRITES_KEY, 1, None)
+
+
+def invalidate_tags(*tags):
+    """Все страницы, отмеченные этими тегами, перестают быть валидными."""
+    delete_keys(tag_key(tag) for tag in tags)
+    count_write()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(count_write)
+
+
+def tag_versions(tags):
+    """Текущие версии тегов; отсутствующим тегам назначается новая."""
+    keys = [tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+    return cache.get_many(keys)
+
+
+def card_version(post):
+    """Версии тегов автора и группы для ключа кеша карточки поста:
+    после переименования автора или смены slug группы ключ меняется."""
+    return ':'.join(sorted(tag_versions(post_tags(post)).values()))
+
+
+def page_key(request):
+    match = request.resolver_match
+    params = [
+        match.args,
+        sorted(match.kwargs.items()),
+        request.GET.get('page'),
+        request.GET.get('cursor'),
+    ]
+    digest = hashlib.md5(
+        json.dumps(params, default=str).encode()
+    ).hexdigest()
+    return f'posts:page:{match.view_name}:{digest}'
+
+
+def cache_page_for_anonymous(view):
+    """Кеширует страницу для анонимных читателей.
+
+    Страница хранится вместе с версиями своих тегов и отдаётся из кеша,
+    пока ни один из тегов не сброшен сигналами моделей. Авторизованным
+    пользователям страница рендерится всегда: у них другая шапка.
+
+    Теги страницы известны только после рендера, поэтому до вызова
+    представления запоминается счётчик сбросов. Если за время рендера
+    какой-то тег сбросили, страница могла собраться из старых данных
+    и в кеш не попадает. Теги сбрасываются только в общем кеше,
+    поэтому без него кеш страниц выключен, см. posts.checks.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        timeout = settings.PAGE_CACHE_TIMEOUT
+        if (not timeout or request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            versions, response = entry
+            if cache.get_many(list(versions)) == versions:
+                page_cache_stats['hits'] += 1
+                response['X-Page-Cache'] = 'hit'
+                return get_conditional_response(
+                    request, etag=response.get('ETag'), response=response
+                )
+        page_cache_stats['misses'] += 1
+        writes = cache.get(WRITES_KEY)
+        response = view(request, *args, **kwargs)
+        tags = getattr(response, 'cache_tags', None)
+        if response.status_code == 200 and tags and not response.cookies:
+            versions = tag_versions(tags)
+            if cache.get(WRITES_KEY) == writes:
+                cache.set(key, (versions, response), timeout)
+            response['X-Page-Cache'] = 'miss'
+        return response
+    return wrapper
+
+
+def user_version(request):
+    """Версия шапки и кнопок подписки для ETag.
+
+    С общим кешем это версии тегов: names сбрасывается при правке групп
+    и авторов, follows — при подписке и отписке пользователя. С locmem
+    теги сбрасываются только в процессе, который сделал запись, поэтому
+    подписки берутся из базы: их число и последний id меняются при любой
+    подписке и отписке. Названия групп и имена авторов в этом случае
+    учитывают ETag конкретных страниц.
+    """
+    if settings.SHARED_CACHE:
+        tags = ['names']
+        if request.user.is_authenticated:
+            tags.append(f'follows:{request.user.pk}')
+        return sorted(tag_versions(tags).values())
+    if not request.user.is_authenticated:
+        return None
+    follows = Follow.objects.filter(user=request.user).aggregate(
+        count=Count('pk'), last=Max('pk')
+    )
+    return [follows['count'], follows['last']]
+
+
+def make_etag(request, *parts):
+    """ETag страницы: данные ленты, страница и пользователь,
+    от которого зависит шапка."""
+    parts = [
+        request.user.pk,
+        request.GET.get('page'),
+        request.GET.get('cursor'),
+        user_version(request),
+        *parts,
+    ]
+    return hashlib.md5(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def feed_version(tags, posts, count):
+    """Версия ленты для ETag. С общим кешем — версии её тегов, которые
+    сбрасываются при каждой записи поста ленты. Иначе — последнее
+    изменение постов ленты по индексу (..., modified) и их число."""
+    if settings.SHARED_CACHE:
+        return sorted(tag_versions(tags).values())
+    return [posts.aggregate(Max('modified'))['modified__max'], count]
+
+
+def index_etag(request):
+    posts = Post.objects.all()
+    count = None if settings.SHARED_CACHE else posts.count()
+    return make_etag(request, feed_version(['feed'], posts, count))
+
+
+def group_etag(request, slug):
+    group = Group.objects.filter(slug=slug).values_list(
+        'pk', 'post_count', 'title', 'description'
+    ).first()
+    if group is None:
+        return None
+    group_id, count, *names = group
+    posts = Post.objects.filter(group_id=group_id)
+    return make_etag(
+        request, names, feed_version([f'group:{group_id}'], posts, count)
+    )
+
+
+def profile_etag(request, username):
+    author = User.objects.filter(username=username).values_list(
+        'pk', 'post_stats__post_count', 'first_name', 'last_name'
+    ).first()
+    if author is None:
+        return None
+    author_id, count, *names = author
+    posts = Post.objects.filter(author_id=author_id)
+    return make_etag(
+        request, names, feed_version([f'author:{author_id}'], posts, count)
+    )
+
+
+def post_etag(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'modified', 'author__post_stats__post_count',
+        'author__first_name', 'author__last_name',
+        'group__title', 'group__slug',
+    ).first()
+    return make_etag(request, *post) if post else None
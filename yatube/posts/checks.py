@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+SHARED_CACHE_TIMEOUTS = ('PAGE_CACHE_TIMEOUT', 'POSTS_COUNT_CACHE_TIMEOUT')
+
+
+@register()
+def check_feed_caches(app_configs, **kwargs):
+    """Страницы и число постов лент сбрасываются сигналами только в кеше
+    процесса, который записал пост: без общего кеша остальные процессы
+    отдавали бы их устаревшими."""
+    if settings.SHARED_CACHE:
+        return []
+    return [
+        Error(
+            f'{name} требует общего для процессов кеша',
+            hint=f'Задайте CACHE_BACKEND=file или redis либо {name} = 0',
+            id='posts.E001',
+        )
+        for name in SHARED_CACHE_TIMEOUTS if getattr(settings, name)
+    ]
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+STATS_BATCH_SIZE = 1000
+
+
+def change_post_counts(author_id, group_id, delta):
+    """Сдвигает счётчики постов автора и группы на delta.
+    При уменьшении строка статистики не создаётся: автор может
+    удаляться вместе со своими постами."""
+    from .models import AuthorStats, Group
+
+    with transaction.atomic():
+        if delta > 0:
+            AuthorStats.objects.get_or_create(author_id=author_id)
+        AuthorStats.objects.filter(author_id=author_id).update(
+            post_count=Greatest(F('post_count') + delta, 0)
+        )
+        if group_id is not None:
+            Group.objects.filter(pk=group_id).update(
+                post_count=Greatest(F('post_count') + delta, 0)
+            )
+
+
+def add_post_counts(author_counts, group_counts):
+    """Добавляет к счётчикам число постов, загруженных в обход сигналов.
+    Принимает словари {author_id: n} и {group_id: n}."""
+    from .models import AuthorStats, Group
+
+    with transaction.atomic():
+        for author_id, count in author_counts.items():
+            AuthorStats.objects.get_or_create(author_id=author_id)
+            AuthorStats.objects.filter(author_id=author_id).update(
+                post_count=F('post_count') + count
+            )
+        for group_id, count in group_counts.items():
+            Group.objects.filter(pk=group_id).update(
+                post_count=F('post_count') + count
+            )
+
+
+def change_follower_count(author_id, group_id, delta):
+    """Сдвигает число подписчиков автора или группы на delta."""
+    from .models import AuthorStats, Group
+
+    with transaction.atomic():
+        if author_id is not None:
+            if delta > 0:
+                AuthorStats.objects.get_or_create(author_id=author_id)
+            AuthorStats.objects.filter(author_id=author_id).update(
+                follower_count=Greatest(F('follower_count') + delta, 0)
+            )
+        if group_id is not None:
+            Group.objects.filter(pk=group_id).update(
+                follower_count=Greatest(F('follower_count') + delta, 0)
+            )
+
+
+def rebuild_post_counts():
+    """Пересчитывает все счётчики постов по таблице постов."""
+    from .models import AuthorStats, Group, Post, User
+
+    group_counts = Post.objects.filter(group=OuterRef('pk')).order_by(
+    ).values('group').annotate(count=Count('pk')).values('count')
+    author_counts = Post.objects.filter(
+        author=OuterRef('author')
+    ).order_by().values('author').annotate(count=Count('pk')).values('count')
+
+    with transaction.atomic():
+        Group.objects.update(post_count=Coalesce(Subquery(group_counts), 0))
+        # Строки статистики обновляются, а не пересоздаются:
+        # в них хранятся и другие счётчики
+        AuthorStats.objects.bulk_create(
+            (AuthorStats(author_id=author_id) for author_id in
+             User.objects.filter(post_stats__isnull=True).values_list(
+                 'pk', flat=True).iterator()),
+            batch_size=STATS_BATCH_SIZE,
+        )
+        AuthorStats.objects.update(
+            post_count=Coalesce(Subquery(author_counts), 0)
+        )
+
+
+def rebuild_follower_counts():
+    """Пересчитывает число подписчиков авторов и групп."""
+    from .models import AuthorStats, Follow, Group
+
+    group_followers = Follow.objects.filter(group=OuterRef('pk')).order_by(
+    ).values('group').annotate(count=Count('pk')).values('count')
+    author_followers = Follow.objects.filter(
+        author=OuterRef('author')
+    ).order_by().values('author').annotate(count=Count('pk')).values('count')
+    with transaction.atomic():
+        Group.objects.update(
+            follower_count=Coalesce(Subquery(group_followers), 0)
+        )
+        AuthorStats.objects.update(
+            follower_count=Coalesce(Subquery(author_followers), 0)
+        )
@@ -0,0 +1,69 @@
+import copy
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.compression import compress, encodings
+from posts.management.commands.benchmark_feeds import (
+    COLD_CACHES, Command as FeedsCommand)
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def templates_settings(minify):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['OPTIONS']['loaders'] = (
+        [('core.loaders.Loader', LOADERS)] if minify else LOADERS
+    )
+    return templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Размер лент и страницы поста в байтах: как есть, после '
+        'минификации шаблонов и после сжатия gzip и brotli'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--depths', default='1,10',
+            help='Номера страниц через запятую',
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON')
+
+    def handle(self, *args, **options):
+        results = {}
+        for minify in (False, True):
+            # Кеш страниц выключен: иначе второй проход получил бы
+            # страницы, отрендеренные без минификации
+            with override_settings(
+                TEMPLATES=templates_settings(minify), **COLD_CACHES
+            ):
+                for name, url in FeedsCommand().scenarios(options['depths']):
+                    content = Client().get(url).content
+                    results.setdefault(name, {}).update(
+                        self.measure(content, 'minified' if minify else 'raw')
+                    )
+        for name, result in results.items():
+            self.stdout.write(f'{name}: {result}')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+    def measure(self, content, variant):
+        result = {f'{variant}_bytes': len(content)}
+        for encoding in encodings():
+            started = time.perf_counter()
+            size = len(compress(content, encoding))
+            result[f'{variant}_{encoding}_bytes'] = size
+            result[f'{variant}_{encoding}_ms'] = round(
+                (time.perf_counter() - started) * 1000, 3
+            )
+        return result
@@ -0,0 +1,205 @@
+import json
+import statistics
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.budgets import VIEW_BUDGETS, measure, timing_errors
+from posts.models import Group, Post, User
+
+PERCENTILES = (50, 90, 99)
+REGRESSION_THRESHOLD = 1.2
+# Без кеша страниц, карточек и счётчиков: каждый запрос рендерится
+# заново, а общий кеш с сессиями и чужими ключами не очищается
+COLD_CACHES = {
+    'POSTS_COUNT_CACHE_TIMEOUT': 0,
+    'PAGE_CACHE_TIMEOUT': 0,
+    'POST_CARD_CACHE_TIMEOUT': 0,
+}
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = min(round(percent / 100 * (len(ordered) - 1)), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(samples):
+    times = [sample['ms'] for sample in samples]
+    summary = {
+        f'p{percent}_ms': round(percentile(times, percent), 3)
+        for percent in PERCENTILES
+    }
+    summary.update({
+        'sql_p50_ms': round(
+            percentile([sample['sql_ms'] for sample in samples], 50), 3
+        ),
+        'mean_ms': round(statistics.mean(times), 3),
+        'queries': max(sample['queries'] for sample in samples),
+        'bytes': max(sample['bytes'] for sample in samples),
+        'requests': len(samples),
+    })
+    return summary
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время, число запросов и размер ответа лент и страницы '
+        'поста на разной глубине пагинации, результат пишет в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--depths', default='1,10,100',
+            help='Номера страниц через запятую',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Замерять без кеша страниц, карточек и счётчиков',
+        )
+        parser.add_argument(
+            '--user', help='Замерять от имени пользователя с этим username'
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON')
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения'
+        )
+        parser.add_argument(
+            '--check-budgets', action='store_true',
+            help='Сверять медианы SQL и рендера с бюджетами core.budgets',
+        )
+
+    def handle(self, *args, **options):
+        self.client = Client()
+        if options['user']:
+            self.client.force_login(User.objects.get(username=options['user']))
+        results = {}
+        views = {}
+        caches = COLD_CACHES if options['cold'] else {}
+        for name, url in self.scenarios(options['depths']):
+            with override_settings(**caches):
+                samples = self.measure(url, options)
+            results[name] = summarize(samples)
+            views[name] = samples[0]['view']
+            self.stdout.write(f'{name}: {results[name]}')
+
+        report = {
+            'meta': {
+                'commit': current_commit(),
+                'date': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'posts': Post.objects.count(),
+                'cold': options['cold'],
+                'user': options['user'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.compare(options['compare'], results)
+        if options['check_budgets']:
+            self.check_budgets(results, views)
+
+    def scenarios(self, depths):
+        """Пары (имя сценария, URL) для всех лент и глубин."""
+        try:
+            depths = [int(depth) for depth in depths.split(',')]
+        except ValueError:
+            raise CommandError('--depths: номера страниц через запятую')
+        feeds = [('posts:index', reverse('posts:index'))]
+        group = Group.objects.annotate(
+            posts_number=Count('publications')
+        ).order_by('-posts_number').first()
+        if group is not None:
+            feeds.append(('posts:group_list', reverse(
+                'posts:group_list', kwargs={'slug': group.slug}
+            )))
+        author = User.objects.annotate(
+            posts_number=Count('posts')
+        ).order_by('-posts_number').first()
+        if author is not None:
+            feeds.append(('posts:profile', reverse(
+                'posts:profile', kwargs={'username': author.username}
+            )))
+        for name, url in feeds:
+            for depth in depths:
+                yield f'{name}?page={depth}', f'{url}?page={depth}'
+        post = Post.objects.order_by('-pub_date').first()
+        if post is not None:
+            yield 'posts:post_detail', reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}
+            )
+
+    def measure(self, url, options):
+        for _ in range(options['warmup']):
+            self.client.get(url)
+        samples = []
+        for _ in range(options['requests']):
+            measurement, response = measure(self.client, url)
+            samples.append({
+                'view': measurement.view_name,
+                'ms': measurement.total_ms,
+                'sql_ms': measurement.sql_ms,
+                'queries': len(measurement.queries),
+                'bytes': len(response.content),
+            })
+        return samples
+
+    def check_budgets(self, results, views):
+        """Сверяет медианы времени сценариев с бюджетами страниц."""
+        exceeded = 0
+        for name, result in results.items():
+            sql_ms = result['sql_p50_ms']
+            errors = timing_errors(
+                VIEW_BUDGETS[views[name]], sql_ms, result['p50_ms'] - sql_ms
+            )
+            exceeded += bool(errors)
+            if errors:
+                self.stdout.write(
+                    f'ПРЕВЫШЕН БЮДЖЕТ {name}: {", ".join(errors)}'
+                )
+        if exceeded:
+            raise CommandError(f'Превышено бюджетов: {exceeded}')
+
+    def compare(self, path, results):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = 0
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            ratio = result['p50_ms'] / max(before['p50_ms'], 1e-6)
+            worse = (
+                ratio > REGRESSION_THRESHOLD
+                or result['queries'] > before['queries']
+            )
+            regressions += worse
+            self.stdout.write(
+                f'{"РЕГРЕССИЯ " if worse else ""}{name}: '
+                f'p50 {before["p50_ms"]} → {result["p50_ms"]} мс '
+                f'(x{ratio:.2f}), запросов {before["queries"]} → '
+                f'{result["queries"]}'
+            )
+        if regressions:
+            raise CommandError(f'Регрессий производительности: {regressions}')
@@ -0,0 +1,82 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Post
+from posts.search import WORD_RE, SearchResults, get_index
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по индексу с LIKE по тексту постов: '
+        'медианное время первой страницы результатов с их числом'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--terms', help='Слова для поиска через запятую')
+        parser.add_argument(
+            '--samples', type=int, default=10,
+            help='Сколько случайных слов из постов взять без --terms',
+        )
+        parser.add_argument('--requests', type=int, default=10)
+        parser.add_argument('--backend', choices=('fts5', 'terms'))
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        words = (
+            options['terms'].split(',') if options['terms']
+            else self.sample_words(options['samples'], options['seed'])
+        )
+        if not words:
+            raise CommandError('Нет постов, из которых взять слова')
+        index = get_index(options['backend'])
+        per_page = settings.POSTS_ON_PAGE
+        like_total = index_total = 0
+        for word in words:
+            def like():
+                posts = Post.objects.feed().filter(text__icontains=word)
+                return posts.count(), list(posts[:per_page])
+
+            def search():
+                results = SearchResults(word, index)
+                return len(results), results[:per_page]
+
+            like_ms, (like_found, _) = timed(like, options['requests'])
+            index_ms, (index_found, _) = timed(search, options['requests'])
+            like_total += like_ms
+            index_total += index_ms
+            self.stdout.write(
+                f'{word}: LIKE {like_ms:.2f} мс ({like_found}), '
+                f'{type(index).__name__} {index_ms:.2f} мс ({index_found}), '
+                f'x{like_ms / max(index_ms, 1e-6):.1f}'
+            )
+        self.stdout.write(
+            f'Итого: LIKE {like_total:.1f} мс, индекс {index_total:.1f} мс'
+        )
+
+    def sample_words(self, samples, seed):
+        random.seed(seed)
+        texts = list(Post.objects.values_list('text', flat=True)[
+            :samples * 10
+        ])
+        texts = random.sample(texts, min(samples, len(texts)))
+        words = []
+        for text in texts:
+            candidates = [
+                word for word in WORD_RE.findall(text) if len(word) > 3
+            ]
+            if candidates:
+                words.append(random.choice(candidates))
+        return words
@@ -0,0 +1,71 @@
+import copy
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.base import Template
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.template_cache import warm_templates
+from posts.management.commands.benchmark_feeds import (
+    COLD_CACHES, Command as FeedsCommand, percentile)
+
+
+def templates_settings(cached):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['OPTIONS']['loaders'] = (
+        [('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)]
+        if cached else settings.TEMPLATE_LOADERS
+    )
+    return templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает страницы posts без кеша шаблонов и с прогретым кешем: '
+        'время ответа и число шаблонов, разобранных за запрос'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+
+    def handle(self, *args, **options):
+        scenarios = list(FeedsCommand().scenarios('1'))
+        for cached in (False, True):
+            mode = 'кеш шаблонов' if cached else 'без кеша'
+            # Страницы и карточки постов не берутся из кеша: каждый запрос
+            # рендерит шаблоны заново, общий кеш при этом не очищается
+            with override_settings(
+                TEMPLATES=templates_settings(cached), **COLD_CACHES
+            ):
+                if cached:
+                    warm_templates()
+                for name, url in scenarios:
+                    result = self.measure(url, options['requests'])
+                    self.stdout.write(f'{mode} {name}: {result}')
+
+    def measure(self, url, requests):
+        client = Client()
+        compiled = []
+        compile_nodelist = Template.compile_nodelist
+
+        def counting(template):
+            compiled.append(template.name)
+            return compile_nodelist(template)
+
+        times = []
+        Template.compile_nodelist = counting
+        try:
+            for _ in range(requests):
+                started = time.perf_counter()
+                client.get(url)
+                times.append((time.perf_counter() - started) * 1000)
+        finally:
+            Template.compile_nodelist = compile_nodelist
+        return {
+            'p50_ms': round(percentile(times, 50), 3),
+            'mean_ms': round(statistics.mean(times), 3),
+            'parsed_per_request': round(len(compiled) / requests, 1),
+        }
@@ -0,0 +1,51 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.transfer import FORMATS, RecordWriter, detect_format
+
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в NDJSON или CSV потоком, не держа их в памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл для выгрузки, «-» — стандартный вывод'
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        rows = Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'author__username', 'group__slug'
+        ).iterator(chunk_size=options['chunk_size'])
+        started = time.monotonic()
+        count = 0
+        stream = (
+            sys.stdout if path == '-'
+            else open(path, 'w', encoding='utf-8', newline='')
+        )
+        try:
+            writer = RecordWriter(stream, fmt)
+            for text, pub_date, author, group in rows:
+                writer.write({
+                    'text': text,
+                    'pub_date': pub_date.isoformat(),
+                    'author': author,
+                    'group': group or '',
+                })
+                count += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            f'Выгружено постов: {count} за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-6):.0f} в секунду)'
+        )
@@ -0,0 +1,165 @@
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from posts.cache import delete_keys, feed_tags, invalidate_tags
+from posts.counters import add_post_counts
+from posts.models import Group, Post, User
+from posts.search import index_posts
+from posts.timeline import fan_out_posts
+from posts.transfer import (FORMATS, detect_format, keep_post_dates,
+                            parse_pub_date, read_records)
+from posts.utils import post_count_keys
+
+BATCH_SIZE = 1000
+REPORT_EVERY = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из NDJSON или CSV пачками через bulk_create; '
+        'авторы и группы ищутся по username и slug'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с постами, «-» — стандартный ввод'
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных авторов и группы',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        self.create_missing = options['create_missing']
+        self.authors = {}
+        self.groups = {}
+        self.skipped = 0
+        imported = batches = 0
+        started = time.monotonic()
+
+        stream = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        records = read_records(stream, fmt)
+        try:
+            with keep_post_dates():
+                while True:
+                    batch = list(islice(records, options['batch_size']))
+                    if not batch:
+                        break
+                    posts = self.build_posts(batch)
+                    self.save_batch(posts)
+                    imported += len(posts)
+                    batches += 1
+                    if batches % REPORT_EVERY == 0:
+                        self.report(imported, started, self.stderr)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.report(imported, started, self.stdout)
+        if self.skipped:
+            self.stderr.write(f'Пропущено записей: {self.skipped}')
+
+    def report(self, imported, started, stream):
+        elapsed = time.monotonic() - started
+        stream.write(
+            f'Загружено постов: {imported} за {elapsed:.1f} с '
+            f'({imported / max(elapsed, 1e-6):.0f} в секунду)'
+        )
+
+    def build_posts(self, records):
+        # Строки, которые не разобрались в запись, read_records отдаёт
+        # как None: они пропускаются, как и записи с неизвестным автором
+        batch = [record for record in records if record is not None]
+        self.skipped += len(records) - len(batch)
+        self.resolve(
+            self.authors, User, 'username',
+            {record.get('author') for record in batch},
+            lambda username: User(
+                username=username, password=make_password(None)
+            ),
+        )
+        self.resolve(
+            self.groups, Group, 'slug',
+            {record.get('group') for record in batch},
+            lambda slug: Group(title=slug, slug=slug, description=''),
+        )
+        now = timezone.now()
+        posts = []
+        for record in batch:
+            author_id = self.authors.get(record.get('author'))
+            group_slug = record.get('group')
+            group_id = self.groups.get(group_slug) if group_slug else None
+            try:
+                pub_date = parse_pub_date(record.get('pub_date')) or now
+            except ValueError:
+                pub_date = None
+            if (not record.get('text') or author_id is None
+                    or (group_slug and group_id is None) or pub_date is None):
+                self.skipped += 1
+                continue
+            posts.append(Post(
+                text=record['text'],
+                author_id=author_id,
+                group_id=group_id,
+                pub_date=pub_date,
+                modified=pub_date,
+            ))
+        return posts
+
+    def save_batch(self, posts):
+        """Сохраняет пачку в одной транзакции со счётчиками, кешами,
+        поисковым индексом и лентами подписчиков: если следующая пачка
+        упадёт, уже загруженные посты останутся согласованными."""
+        if not posts:
+            return
+        author_counts = Counter(post.author_id for post in posts)
+        group_counts = Counter(
+            post.group_id for post in posts if post.group_id is not None
+        )
+        feeds = {(post.author_id, post.group_id) for post in posts}
+        with transaction.atomic():
+            last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+            Post.objects.bulk_create(posts)
+            # bulk_create на SQLite не возвращает id: перечитываем пачку
+            created = list(Post.objects.filter(pk__gt=last_pk).only(
+                'text', 'author_id', 'group_id', 'pub_date'
+            ))
+            add_post_counts(author_counts, group_counts)
+            # bulk_create не посылает сигналы: сбрасываем кеш лент вручную
+            delete_keys(post_count_keys(*feeds))
+            invalidate_tags('feed', *feed_tags(*feeds))
+            index_posts(created)
+            fan_out_posts(created)
+
+    def resolve(self, lookup, model, field, values, factory):
+        """Дополняет кеш соответствий значение → id одним запросом
+        на пачку, при --create-missing создаёт недостающие объекты."""
+        missing = {value for value in values if value} - lookup.keys()
+        if not missing:
+            return
+        lookup.update(model.objects.filter(
+            **{f'{field}__in': missing}
+        ).values_list(field, 'pk'))
+        missing -= lookup.keys()
+        if missing and self.create_missing:
+            model.objects.bulk_create(factory(value) for value in missing)
+            lookup.update(model.objects.filter(
+                **{f'{field}__in': missing}
+            ).values_list(field, 'pk'))
+        # Ненайденные тоже запоминаем, чтобы не искать их в каждой пачке
+        lookup.update(dict.fromkeys(missing - lookup.keys()))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import rebuild_follower_counts, rebuild_post_counts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов и подписчиков авторов и групп'
+
+    def handle(self, *args, **options):
+        rebuild_post_counts()
+        rebuild_follower_counts()
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Строит заново поисковый индекс постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend', choices=('fts5', 'terms'),
+            help='Какой индекс строить, по умолчанию — используемый поиском',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rebuild_index(backend=options['backend'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс построен за {time.monotonic() - started:.1f} с'
+        ))
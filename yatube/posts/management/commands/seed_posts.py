@@ -0,0 +1,100 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from posts.cache import delete_keys, feed_tags, invalidate_tags
+from posts.counters import rebuild_post_counts
+from posts.models import Group, Post, User
+from posts.search import index_posts
+from posts.transfer import keep_post_dates
+from posts.utils import post_count_keys
+
+BATCH_SIZE = 5000
+DAYS_OF_POSTS = 365
+
+
+class Command(BaseCommand):
+    help = 'Наполняет базу синтетическими авторами, группами и постами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        fake = Faker('ru_RU')
+        fake.seed_instance(options['seed'])
+        started = time.monotonic()
+        batch_size = options['batch_size']
+        prefix = f'seed{int(time.time())}'
+
+        User.objects.bulk_create(
+            (User(
+                username=f'{prefix}_{i}',
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+                password=make_password(None),
+            ) for i in range(options['users'])),
+            batch_size,
+        )
+        Group.objects.bulk_create(
+            (Group(
+                title=fake.catch_phrase()[:200],
+                slug=f'{prefix}-{i}'[:20],
+                description=fake.paragraph(),
+            ) for i in range(options['groups'])),
+            batch_size,
+        )
+        authors = list(User.objects.filter(
+            username__startswith=f'{prefix}_'
+        ).values_list('pk', flat=True))
+        groups = list(Group.objects.filter(
+            slug__startswith=f'{prefix}-'
+        ).values_list('pk', flat=True)) + [None]
+
+        now = timezone.now()
+        left = options['posts']
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        feeds = set()
+        with keep_post_dates():
+            while left > 0:
+                posts = []
+                for _ in range(min(batch_size, left)):
+                    pub_date = now - timedelta(
+                        seconds=random.randint(0, DAYS_OF_POSTS * 86400)
+                    )
+                    posts.append(Post(
+                        text=fake.text(max_nb_chars=100),
+                        author_id=random.choice(authors),
+                        group_id=random.choice(groups),
+                        pub_date=pub_date,
+                        modified=pub_date,
+                    ))
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+                feeds.update((post.author_id, post.group_id) for post in posts)
+                left -= len(posts)
+
+        rebuild_post_counts()
+        index_posts(
+            Post.objects.filter(pk__gt=last_pk).only('text').iterator()
+        )
+        # bulk_create не посылает сигналы: сбрасываем кеш лент вручную,
+        # не трогая остальные ключи общего кеша
+        delete_keys(post_count_keys(*feeds))
+        invalidate_tags('feed', *feed_tags(*feeds))
+        self.stdout.write(
+            f'Создано авторов: {len(authors)}, групп: {len(groups) - 1}, '
+            f'постов: {options["posts"]} '
+            f'за {time.monotonic() - started:.1f} с'
+        )
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:19
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+STATS_BATCH_SIZE = 1000
+
+
+def fill_post_counts(apps, schema_editor):
+    # Логика пересчёта скопирована из posts.counters на момент миграции:
+    # миграция не должна зависеть от текущего кода приложения
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    group_counts = Post.objects.filter(group=OuterRef('pk')).order_by(
+    ).values('group').annotate(count=Count('pk')).values('count')
+    Group.objects.update(post_count=Coalesce(Subquery(group_counts), 0))
+    authors = User.objects.annotate(
+        post_count=Count('posts')
+    ).values_list('pk', 'post_count')
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(author_id=author_id, post_count=post_count)
+         for author_id, post_count in authors.iterator()),
+        batch_size=STATS_BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0004_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число постов'),
+        ),
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='post_stats', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+        ),
+        migrations.RunPython(fill_post_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:34
+
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import OperationalError, migrations, models
+import django.db.models.deletion
+
+# Стеммер и индексация скопированы из posts.search на момент миграции:
+# миграция не должна зависеть от текущего кода приложения
+FTS_TABLE = 'posts_post_fts'
+BATCH_SIZE = 1000
+WORD_RE = re.compile(r'\w+')
+
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+DERIVATIONAL = re.compile(r'[^аеиоуыэюя][аеиоуыэюя]+[^аеиоуыэюя]+.*ость?$')
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+
+
+def stem(word):
+    """Основа слова; слова не на кириллице только приводятся к нижнему
+    регистру."""
+    word = word.lower().replace('ё', 'е')
+    match = RV.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    ending = PERFECTIVE_GERUND.sub('', rv, 1)
+    if ending != rv:
+        rv = ending
+    else:
+        rv = REFLEXIVE.sub('', rv, 1)
+        ending = ADJECTIVE.sub('', rv, 1)
+        if ending != rv:
+            rv = PARTICIPLE.sub('', ending, 1)
+        else:
+            ending = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if ending == rv else ending
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    if DERIVATIONAL.search(rv):
+        rv = re.sub(r'ость?$', '', rv)
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    return start + rv
+
+
+def terms(text):
+    return [stem(word) for word in WORD_RE.findall(text)]
+
+
+def has_fts5(connection):
+    return (
+        connection.vendor == 'sqlite'
+        and FTS_TABLE in connection.introspection.table_names()
+    )
+
+
+def create_fts5(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} '
+            f"USING fts5(terms, tokenize='unicode61 remove_diacritics 0')"
+        )
+    except OperationalError:
+        # SQLite собран без FTS5: остаётся индекс SearchTerm
+        pass
+
+
+def drop_fts5(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def fill_search_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    connection = schema_editor.connection
+    backend = settings.POSTS_SEARCH_BACKEND
+    if backend == 'auto':
+        backend = 'fts5' if has_fts5(connection) else 'terms'
+    posts = Post.objects.values_list('pk', 'text').iterator()
+    if backend == 'fts5':
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                ((pk, ' '.join(terms(text))) for pk, text in posts),
+            )
+        return
+    SearchTerm.objects.bulk_create(
+        (SearchTerm(post_id=pk, term=term, count=count)
+         for pk, text in posts
+         for term, count in Counter(terms(text)).items()),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, verbose_name='Основа слова')),
+                ('count', models.PositiveSmallIntegerField(default=1, verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'unique_together': {('term', 'post')},
+            },
+        ),
+        migrations.RunPython(create_fts5, drop_fts5),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
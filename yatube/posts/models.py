@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -8,17 +8,45 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=20, unique=True)
     description = models.TextField()
+    post_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов',
+    )
+    follower_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число подписчиков',
+    )
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для лент: автор и группа одним запросом,
+        неиспользуемые в карточке поля не загружаются."""
+        return self.select_related('author', 'group').only(
+            'text',
+            'pub_date',
+            'modified',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__title',
+            'group__slug',
+        )
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Пост',
                             help_text='Текст нового поста', max_length=100)
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации',
                                     help_text='Здесь действующая дата')
+    modified = models.DateTimeField(auto_now=True,
+                                    verbose_name='Дата изменения')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -35,9 +63,157 @@ class Post(models.Model):
         help_text='Группа, к которой будет относиться пост'
     )
 
+    objects = PostQuerySet.as_manager()
+
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Счётчики и кеши из сигнала post_save меняются в той же
+        # транзакции, что и сам пост
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Исходные автор и группа нужны сигналам при переносе поста
+        loaded = dict(zip(field_names, values))
+        if 'author_id' in loaded and 'group_id' in loaded:
+            instance._loaded_feeds = loaded['author_id'], loaded['group_id']
+        return instance
+
     class Meta:
         default_related_name = 'publications'
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        # Индексы под ленты: общая, группы и автора
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_feed_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_feed_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_feed_idx'),
+            # MAX(modified) для ETag лент без общего кеша
+            models.Index(fields=['modified'], name='post_modified_idx'),
+            models.Index(fields=['group', 'modified'],
+                         name='post_group_modified_idx'),
+            models.Index(fields=['author', 'modified'],
+                         name='post_author_modified_idx'),
+        ]
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='post_stats',
+        verbose_name='Автор',
+    )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов',
+    )
+    follower_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков',
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.post_count}'
+
+
+class SearchTerm(models.Model):
+    """Запись обратного индекса: основа слова и её вхождения в пост."""
+    term = models.CharField(max_length=100, verbose_name='Основа слова')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Пост',
+    )
+    count = models.PositiveSmallIntegerField(
+        default=1,
+        verbose_name='Число вхождений',
+    )
+
+    class Meta:
+        unique_together = ('term', 'post')
+
+    def __str__(self):
+        return f'{self.term}: {self.post_id}'
+
+
+class Follow(models.Model):
+    """Подписка пользователя на автора или на группу."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='following',
+        verbose_name='Автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='followers',
+        verbose_name='Группа',
+    )
+
+    class Meta:
+        unique_together = [('user', 'author'), ('user', 'group')]
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(author__isnull=False, group__isnull=True)
+                    | models.Q(author__isnull=True, group__isnull=False)
+                ),
+                name='follow_author_or_group',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} → {self.author or self.group}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя, записанный при публикации.
+
+    Дата поста продублирована, чтобы страница ленты читалась
+    одним проходом по индексу (user, -pub_date, -post).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.post_id}'
@@ -0,0 +1,254 @@
+"""Полнотекстовый поиск по постам.
+
+Слова приводятся к основе упрощённым стеммером Портера для русского
+языка. Основы хранятся в FTS5-таблице, если база — SQLite с FTS5,
+иначе в обратном индексе SearchTerm, который ранжируется на Python.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import connection, connections, router, transaction
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = 'posts_post_fts'
+INDEX_BATCH_SIZE = 1000
+MAX_QUERY_TERMS = 10
+WORD_RE = re.compile(r'\w+')
+
+_fts5_tables = {}
+
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+DERIVATIONAL = re.compile(r'[^аеиоуыэюя][аеиоуыэюя]+[^аеиоуыэюя]+.*ость?$')
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+
+
+def stem(word):
+    """Основа слова; слова не на кириллице только приводятся к нижнему
+    регистру."""
+    word = word.lower().replace('ё', 'е')
+    match = RV.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    ending = PERFECTIVE_GERUND.sub('', rv, 1)
+    if ending != rv:
+        rv = ending
+    else:
+        rv = REFLEXIVE.sub('', rv, 1)
+        ending = ADJECTIVE.sub('', rv, 1)
+        if ending != rv:
+            rv = PARTICIPLE.sub('', ending, 1)
+        else:
+            ending = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if ending == rv else ending
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    if DERIVATIONAL.search(rv):
+        rv = re.sub(r'ость?$', '', rv)
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    return start + rv
+
+
+def terms(text):
+    return [stem(word) for word in WORD_RE.findall(text)]
+
+
+def query_terms(query):
+    """Уникальные основы запроса в порядке появления."""
+    return list(dict.fromkeys(terms(query)))[:MAX_QUERY_TERMS]
+
+
+def highlight(text, stems):
+    """Экранированный текст, совпавшие слова обёрнуты в <mark>."""
+    parts = []
+    last = 0
+    for match in WORD_RE.finditer(text):
+        if stem(match.group()) in stems:
+            parts.append(escape(text[last:match.start()]))
+            parts.append(format_html('<mark>{}</mark>', match.group()))
+            last = match.end()
+    parts.append(escape(text[last:]))
+    return mark_safe(''.join(parts))
+
+
+def fts5_ready():
+    """Есть ли в базе таблица FTS5; создаётся миграцией только на SQLite."""
+    name = connection.settings_dict['NAME']
+    if name not in _fts5_tables:
+        _fts5_tables[name] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts5_tables[name]
+
+
+class FTS5Index:
+    """Основы слов постов в FTS5, ранжирование — встроенный bm25."""
+
+    def add(self, posts):
+        rows = [(post.pk, ' '.join(terms(post.text))) for post in posts]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk, _ in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, terms) VALUES (%s, %s)',
+                rows,
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in post_ids],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def search(self, stems):
+        match = ' '.join(f'"{term}"' for term in stems)
+        using = router.db_for_read(global_apps.get_model('posts', 'Post'))
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank, rowid DESC',
+                [match],
+            )
+            return [pk for pk, in cursor.fetchall()]
+
+
+class TermIndex:
+    """Обратный индекс в таблице SearchTerm для баз без FTS5.
+
+    Находит посты со всеми основами запроса и ранжирует их по TF-IDF.
+    """
+
+    def __init__(self):
+        self.Post = global_apps.get_model('posts', 'Post')
+        self.SearchTerm = global_apps.get_model('posts', 'SearchTerm')
+
+    def add(self, posts):
+        entries = []
+        for post in posts:
+            entries.extend(
+                self.SearchTerm(post_id=post.pk, term=term, count=count)
+                for term, count in Counter(terms(post.text)).items()
+            )
+        self.remove([post.pk for post in posts])
+        self.SearchTerm.objects.bulk_create(entries)
+
+    def remove(self, post_ids):
+        self.SearchTerm.objects.filter(post_id__in=post_ids).delete()
+
+    def clear(self):
+        self.SearchTerm.objects.all().delete()
+
+    def search(self, stems):
+        postings = defaultdict(dict)
+        for term, post_id, count in self.SearchTerm.objects.filter(
+                term__in=stems).values_list('term', 'post_id', 'count'):
+            postings[term][post_id] = count
+        if len(postings) < len(stems):
+            return []
+        found = set.intersection(*(set(posts) for posts in postings.values()))
+        total = self.Post.objects.count()
+        scores = Counter()
+        for posts in postings.values():
+            idf = math.log(1 + total / len(posts))
+            for post_id in found:
+                count = posts[post_id]
+                scores[post_id] += count / (count + 1.2) * idf
+        return sorted(found, key=lambda pk: (-scores[pk], -pk))
+
+
+def get_index(backend=None):
+    backend = backend or settings.POSTS_SEARCH_BACKEND
+    if backend == 'auto':
+        backend = 'fts5' if fts5_ready() else 'terms'
+    return FTS5Index() if backend == 'fts5' else TermIndex()
+
+
+def index_posts(posts, index=None):
+    """Добавляет или обновляет посты в индексе пачками."""
+    index = index or get_index()
+    batch = []
+    for post in posts:
+        batch.append(post)
+        if len(batch) >= INDEX_BATCH_SIZE:
+            index.add(batch)
+            batch = []
+    if batch:
+        index.add(batch)
+
+
+def unindex_posts(post_ids):
+    get_index().remove(post_ids)
+
+
+def rebuild_index(backend=None):
+    """Строит индекс заново."""
+    Post = global_apps.get_model('posts', 'Post')
+    index = get_index(backend)
+    with transaction.atomic():
+        index.clear()
+        index_posts(Post.objects.only('text').iterator(), index)
+
+
+class SearchResults(Sequence):
+    """Найденные посты по рангу; посты страницы загружаются по срезу,
+    поэтому результаты можно отдать обычному Paginator."""
+
+    def __init__(self, query, index=None):
+        self.stems = query_terms(query)
+        self.ids = (index or get_index()).search(self.stems) if (
+            self.stems) else []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        from .models import Post
+
+        ids = self.ids[index]
+        posts = Post.objects.feed().in_bulk(ids)
+        stems = set(self.stems)
+        page = []
+        for pk in ids:
+            if pk in posts:
+                post = posts[pk]
+                post.highlighted = highlight(post.text, stems)
+                page.append(post)
+        return page
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.jobs import enqueue
+from .cache import delete_keys, feed_tags, invalidate_tags
+from .counters import change_post_counts
+from .models import Group, Post, User
+from .utils import post_count_keys
+
+
+def post_feeds(post):
+    return post.author_id, post.group_id
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_feeds', None)
+    current = post_feeds(instance)
+    if created:
+        change_post_counts(*current, 1)
+    elif loaded is not None and loaded != current:
+        change_post_counts(*loaded, -1)
+        change_post_counts(*current, 1)
+    feeds = [current] if loaded is None else [current, loaded]
+    if loaded != current:
+        delete_keys(post_count_keys(*feeds))
+    invalidate_tags('feed', f'post:{instance.pk}', *feed_tags(*feeds))
+    instance._loaded_feeds = current
+    enqueue('posts.reindex', post_id=instance.pk)
+    if created or loaded != current:
+        # Ключ по дате изменения: одно сохранение ставит одну задачу,
+        # но возврат поста в прежнюю группу раскладывает его заново
+        enqueue(
+            'posts.fan_out',
+            key=f'fan-out:{instance.pk}:{instance.modified.isoformat()}',
+            post_id=instance.pk,
+            moved=not created,
+        )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_post_counts(*post_feeds(instance), -1)
+    delete_keys(post_count_keys(post_feeds(instance)))
+    invalidate_tags(
+        'feed', f'post:{instance.pk}', *feed_tags(post_feeds(instance))
+    )
+    enqueue('posts.reindex', post_id=instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    invalidate_tags(f'group:{instance.pk}', 'names')
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя сохраняет только last_login, страницы не меняются
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_tags(f'author:{instance.pk}', 'names')
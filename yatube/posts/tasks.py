@@ -0,0 +1,30 @@
+from core.jobs import task
+
+from .models import Post
+from .search import index_posts, unindex_posts
+from .timeline import fan_out, prune_entries
+
+
+@task('posts.reindex', batch=True)
+def reindex(payloads):
+    """Обновляет поисковый индекс постов; удалённые посты убирает."""
+    ids = {payload['post_id'] for payload in payloads}
+    posts = list(Post.objects.filter(pk__in=ids).only('text'))
+    index_posts(posts)
+    gone = ids - {post.pk for post in posts}
+    if gone:
+        unindex_posts(gone)
+
+
+@task('posts.fan_out')
+def fan_out_post(post_id, moved=False):
+    """Раскладывает пост по лентам подписчиков; перенесённый пост
+    сначала убирает из лент подписчиков прежних автора и группы."""
+    post = Post.objects.filter(pk=post_id).only(
+        'author_id', 'group_id', 'pub_date'
+    ).first()
+    if post is None:
+        return
+    if moved:
+        prune_entries(post)
+    fan_out(post)
@@ -0,0 +1,7 @@
+from django import template
+
+from posts.cache import card_version
+
+register = template.Library()
+
+register.filter('card_version', card_version)
@@ -0,0 +1,69 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.budgets import Budget, BudgetTestMixin, VIEW_BUDGETS
+from posts.models import Group, Post, User
+from posts.urls import urlpatterns
+from yatube.settings import POSTS_ON_PAGE
+
+
+class PostsBudgetTest(BudgetTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(POSTS_ON_PAGE + 1):
+            cls.post = Post.objects.create(
+                author=cls.user, text=f'Пост {i}', group=cls.group
+            )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def test_pages_within_budget(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            for client in (self.client, self.author_client):
+                with self.subTest(url=url, client=client):
+                    self.assertWithinBudget(url, client)
+
+    def test_forms_within_budget(self):
+        urls = (
+            (reverse('posts:post_create'), 'get'),
+            (reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+             'get'),
+            (reverse('posts:group_follow', kwargs={'slug': self.group.slug}),
+             'post'),
+            (reverse('posts:group_unfollow',
+                     kwargs={'slug': self.group.slug}), 'post'),
+        )
+        for url, method in urls:
+            with self.subTest(url=url):
+                self.assertWithinBudget(
+                    url, self.author_client, method=method
+                )
+
+    def test_budgets_declared_for_all_views(self):
+        for pattern in urlpatterns:
+            with self.subTest(name=pattern.name):
+                self.assertIn(f'posts:{pattern.name}', VIEW_BUDGETS)
+
+    def test_report_lists_queries(self):
+        with self.assertRaisesRegex(AssertionError, 'posts_post'):
+            self.assertWithinBudget(
+                reverse('posts:index'),
+                budget=Budget(queries=0, sql_ms=100, render_ms=1000),
+            )
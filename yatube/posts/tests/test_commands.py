@@ -0,0 +1,221 @@
+import json
+import os
+import tempfile
+import warnings
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from core.budgets import VIEW_BUDGETS, Budget
+from posts.models import (AuthorStats, Follow, Group, Post, TimelineEntry,
+                          User)
+from posts.timeline import fan_out_posts
+
+POSTS_CREATED = 7
+
+
+class TransferPostsCommandsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(POSTS_CREATED):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {i}',
+                group=cls.group if i % 2 else None,
+            )
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def call(self, *args):
+        call_command(*args, stdout=StringIO(), stderr=StringIO())
+
+    def snapshot(self):
+        return list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'author__username', 'group__slug'
+        ))
+
+    def test_round_trip(self):
+        expected = self.snapshot()
+        for name in ('posts.ndjson', 'posts.csv'):
+            with self.subTest(name=name):
+                self.call('export_posts', self.path(name))
+                Post.objects.all().delete()
+                self.call(
+                    'import_posts', self.path(name), '--batch-size', '3'
+                )
+                self.assertEqual(self.snapshot(), expected)
+                self.assertEqual(
+                    AuthorStats.objects.get(author=self.user).post_count,
+                    POSTS_CREATED,
+                )
+                self.group.refresh_from_db()
+                self.assertEqual(
+                    self.group.post_count, POSTS_CREATED // 2
+                )
+
+    def test_unknown_authors_and_groups(self):
+        records = [
+            {'text': 'Известный автор', 'author': 'Author'},
+            {'text': 'Новый автор', 'author': 'Newcomer', 'group': 'new'},
+            {'text': '', 'author': 'Author'},
+        ]
+        with open(self.path('new.ndjson'), 'w', encoding='utf-8') as file:
+            file.writelines(json.dumps(record) + '\n' for record in records)
+        count = Post.objects.count()
+
+        self.call('import_posts', self.path('new.ndjson'))
+        self.assertEqual(Post.objects.count(), count + 1)
+
+        self.call('import_posts', self.path('new.ndjson'), '--create-missing')
+        self.assertEqual(Post.objects.count(), count + 3)
+        post = Post.objects.get(text='Новый автор')
+        self.assertEqual(post.group.slug, 'new')
+        self.assertFalse(post.author.has_usable_password())
+
+    def test_bad_records_skipped(self):
+        lines = [
+            '{"text": "Без пояса", "author": "Author", '
+            '"pub_date": "2024-01-02T03:04:05"}',
+            '{"text": "Оборванная строка", "author":',
+            '["не", "объект"]',
+            '{"text": "Нет такой даты", "author": "Author", '
+            '"pub_date": "2024-13-45T00:00:00"}',
+            '{"text": "Не дата", "author": "Author", "pub_date": "вчера"}',
+        ]
+        with open(self.path('bad.ndjson'), 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        err = StringIO()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            call_command(
+                'import_posts', self.path('bad.ndjson'),
+                stdout=StringIO(), stderr=err,
+            )
+        self.assertIn('Пропущено записей: 4', err.getvalue())
+        post = Post.objects.get(text='Без пояса')
+        self.assertEqual(
+            post.pub_date, datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        )
+
+    def write_posts(self, name, count):
+        with open(self.path(name), 'w', encoding='utf-8') as file:
+            file.writelines(
+                json.dumps({'text': f'Импорт {i}', 'author': 'Author'})
+                + '\n' for i in range(count)
+            )
+
+    def test_imported_posts_fanned_out(self):
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=self.user)
+        self.write_posts('posts.ndjson', 3)
+        self.call('import_posts', self.path('posts.ndjson'))
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=reader, post__text__startswith='Импорт'
+            ).count(),
+            3,
+        )
+
+    def test_failed_batch_keeps_earlier_batches_counted(self):
+        self.write_posts('posts.ndjson', 4)
+        calls = []
+
+        def fail_second_batch(posts):
+            calls.append(posts)
+            if len(calls) == 2:
+                raise RuntimeError('сбой пачки')
+            fan_out_posts(posts)
+
+        with mock.patch(
+            'posts.management.commands.import_posts.fan_out_posts',
+            side_effect=fail_second_batch,
+        ):
+            with self.assertRaises(RuntimeError):
+                self.call(
+                    'import_posts', self.path('posts.ndjson'),
+                    '--batch-size', '2',
+                )
+        self.assertEqual(Post.objects.count(), POSTS_CREATED + 2)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).post_count,
+            POSTS_CREATED + 2,
+        )
+
+
+class BenchmarkCommandsTest(TestCase):
+    def test_seed_and_benchmark(self):
+        call_command(
+            'seed_posts', '--users', '3', '--groups', '2', '--posts', '25',
+            stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 25)
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('post_count', flat=True)), 25
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'bench.json')
+            call_command(
+                'benchmark_feeds', '--requests', '2', '--warmup', '0',
+                '--depths', '1,2', '--output', output, stdout=StringIO(),
+            )
+            with open(output, encoding='utf-8') as file:
+                report = json.load(file)
+            baseline = os.path.join(directory, 'baseline.json')
+            for queries, regression in ((1000, False), (0, True)):
+                for result in report['results'].values():
+                    result.update(p50_ms=1e6, queries=queries)
+                with open(baseline, 'w', encoding='utf-8') as file:
+                    json.dump(report, file)
+                with self.subTest(regression=regression):
+                    try:
+                        call_command(
+                            'benchmark_feeds', '--requests', '1',
+                            '--depths', '1', '--compare', baseline,
+                            stdout=StringIO(),
+                        )
+                    except CommandError:
+                        self.assertTrue(regression)
+                    else:
+                        self.assertFalse(regression)
+            with open(output, encoding='utf-8') as file:
+                report = json.load(file)
+        self.assertEqual(report['meta']['posts'], 25)
+        self.assertIn('posts:index?page=2', report['results'])
+        self.assertIn('posts:post_detail', report['results'])
+        result = report['results']['posts:index?page=1']
+        self.assertEqual(result['requests'], 2)
+        self.assertGreater(result['bytes'], 0)
+        self.assertGreater(result['queries'], 0)
+
+    def test_check_budgets(self):
+        call_command(
+            'seed_posts', '--users', '1', '--groups', '1', '--posts', '3',
+            stdout=StringIO(),
+        )
+        tight = {
+            name: Budget(queries=100, sql_ms=0, render_ms=0)
+            for name in VIEW_BUDGETS
+        }
+        out = StringIO()
+        with mock.patch.dict(VIEW_BUDGETS, tight):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'benchmark_feeds', '--requests', '1', '--warmup', '0',
+                    '--depths', '1', '--check-budgets', stdout=out,
+                )
+        self.assertIn('ПРЕВЫШЕН БЮДЖЕТ posts:index?page=1', out.getvalue())
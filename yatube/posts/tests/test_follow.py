@@ -0,0 +1,147 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.jobs import run_pending
+from posts.models import AuthorStats, Follow, Group, Post, TimelineEntry, User
+
+
+class FollowTimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Пост до подписки'
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def timeline(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return [post.pk for post in response.context['page_obj']]
+
+    def follow_author(self):
+        self.reader_client.post(
+            reverse('posts:profile_follow', kwargs={'username': 'Author'})
+        )
+
+    def test_follow_backfills_and_fans_out(self):
+        self.follow_author()
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.timeline(), [post.pk, self.old_post.pk])
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).follower_count, 1
+        )
+
+    def test_group_follow(self):
+        self.reader_client.post(
+            reverse('posts:group_follow', kwargs={'slug': self.group.slug})
+        )
+        post = Post.objects.create(
+            author=self.author, text='Пост группы', group=self.group
+        )
+        self.assertEqual(self.timeline(), [post.pk])
+
+    def test_unfollow_keeps_posts_of_other_follows(self):
+        self.follow_author()
+        self.reader_client.post(
+            reverse('posts:group_follow', kwargs={'slug': self.group.slug})
+        )
+        post = Post.objects.create(
+            author=self.author, text='Пост группы', group=self.group
+        )
+        self.reader_client.post(
+            reverse('posts:profile_unfollow', kwargs={'username': 'Author'})
+        )
+        self.assertEqual(self.timeline(), [post.pk])
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).follower_count, 0
+        )
+
+    def test_follow_requires_post(self):
+        urls = (
+            reverse('posts:profile_follow', kwargs={'username': 'Author'}),
+            reverse('posts:profile_unfollow', kwargs={'username': 'Author'}),
+            reverse('posts:group_follow', kwargs={'slug': self.group.slug}),
+            reverse('posts:group_unfollow', kwargs={'slug': self.group.slug}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertEqual(response.status_code, 405)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_moved_post_leaves_old_group_timelines(self):
+        other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        self.reader_client.post(
+            reverse('posts:group_follow', kwargs={'slug': self.group.slug})
+        )
+        post = Post.objects.create(
+            author=self.author, text='Пост группы', group=self.group
+        )
+        self.assertEqual(self.timeline(), [post.pk])
+        post = Post.objects.get(pk=post.pk)
+        post.group = other_group
+        post.save()
+        self.assertEqual(self.timeline(), [])
+
+    @override_settings(JOBS_EAGER=False)
+    def test_post_moved_back_returns_to_timeline(self):
+        other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        self.reader_client.post(
+            reverse('posts:group_follow', kwargs={'slug': self.group.slug})
+        )
+        post = Post.objects.create(
+            author=self.author, text='Пост группы', group=self.group
+        )
+        run_pending()
+        for group in (other_group, self.group):
+            post = Post.objects.get(pk=post.pk)
+            post.group = group
+            post.save()
+            run_pending()
+        self.assertEqual(self.timeline(), [post.pk])
+
+    def test_cannot_follow_self(self):
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(
+            reverse('posts:profile_follow', kwargs={'username': 'Author'})
+        )
+        self.assertFalse(Follow.objects.exists())
+
+    @override_settings(FOLLOW_FAN_OUT_LIMIT=0)
+    def test_popular_author_read_on_request(self):
+        self.follow_author()
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.timeline(), [post.pk, self.old_post.pk])
+
+    def test_timeline_page_queries(self):
+        self.follow_author()
+        # С locmem сессия и пользователь читаются из базы: сессия,
+        # пользователь, подписки на популярных, число и страница
+        with self.assertNumQueries(5):
+            self.reader_client.get(reverse('posts:follow_index'))
+
+    def test_follow_button_state(self):
+        url = reverse('posts:profile', kwargs={'username': 'Author'})
+        self.assertContains(self.reader_client.get(url), 'Подписаться')
+        self.follow_author()
+        self.assertContains(self.reader_client.get(url), 'Отписаться')
@@ -1,11 +1,20 @@
+from io import StringIO
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Group, Post
+from yatube.settings import POSTS_ON_PAGE
+from ..models import AuthorStats, Group, Post
 
 User = get_user_model()
 
 LEN_POSTS = 15
+POSTS_SEEDED = 2000
+GROUPS_SEEDED = 20
 
 
 class PostModelTest(TestCase):
@@ -59,3 +68,121 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     Post._meta.get_field(field).help_text, expected_value
                 )
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class PostFeedIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create_user(username=f'author{i}') for i in range(5)
+        ]
+        cls.groups = Group.objects.bulk_create(
+            Group(title=f'{i}', slug=f'slug-{i}', description='')
+            for i in range(GROUPS_SEEDED)
+        )
+        cls.group = Group.objects.first()
+        Post.objects.bulk_create(
+            Post(
+                text=f'{i}',
+                author=cls.users[i % len(cls.users)],
+                group=cls.groups[i % GROUPS_SEEDED] if i % 3 else None,
+            )
+            for i in range(POSTS_SEEDED)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def query_plans(self, queryset):
+        """Планы запросов страницы ленты и счётчика пагинатора."""
+        with CaptureQueriesContext(connection) as context:
+            list(queryset[:POSTS_ON_PAGE])
+            queryset.count()
+        plans = []
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans.append(' '.join(row[-1] for row in cursor.fetchall()))
+        return plans
+
+    def test_feeds_use_indexes(self):
+        feeds = {
+            'post_feed_idx': Post.objects.feed(),
+            'post_group_feed_idx': self.group.publications.feed(),
+            'post_author_feed_idx': self.users[0].posts.feed(),
+        }
+        for index, queryset in feeds.items():
+            with self.subTest(index=index):
+                page_plan, count_plan = self.query_plans(queryset)
+                self.assertIn(index, page_plan)
+                self.assertNotIn('TEMP B-TREE', page_plan)
+                self.assertIn('COVERING INDEX', count_plan)
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.other_user = User.objects.create_user(username="Other")
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def assertCounts(self, author_count, group_count):
+        stats = AuthorStats.objects.get(author=self.user)
+        self.group.refresh_from_db()
+        self.assertEqual(stats.post_count, author_count)
+        self.assertEqual(self.group.post_count, group_count)
+
+    def test_counts_follow_create_and_delete(self):
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Без группы')
+        self.assertCounts(2, 1)
+        post.delete()
+        self.assertCounts(1, 0)
+
+    def test_counts_follow_author_and_group_change(self):
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.author = self.other_user
+        post.group = self.other_group
+        post.save()
+        self.assertCounts(0, 0)
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.other_group.post_count, 1)
+        self.assertEqual(self.other_user.post_stats.post_count, 1)
+
+    def test_deleting_author_with_posts(self):
+        author = User.objects.create_user(username='Leaving')
+        Post.objects.create(author=author, text='Пост', group=self.group)
+        author_id = author.pk
+        author.delete()
+        self.assertFalse(
+            AuthorStats.objects.filter(author_id=author_id).exists()
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+
+    def test_rebuild_command_recounts_bulk_created_posts(self):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'{i}', group=self.group)
+            for i in range(3)
+        )
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertCounts(3, 3)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.other_user).post_count, 0
+        )
@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, SearchTerm, User
+from posts.search import SearchResults, fts5_ready, highlight, stem
+
+
+class StemTest(TestCase):
+    def test_word_forms_share_stem(self):
+        forms = (
+            ('книга', 'книгами', 'книге'),
+            ('красивый', 'красивая', 'красивые'),
+            ('писать', 'писали'),
+        )
+        for words in forms:
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+    def test_highlight_escapes_text(self):
+        self.assertEqual(
+            highlight('<b>Книги</b> и книга', {stem('книга')}),
+            '&lt;b&gt;<mark>Книги</mark>&lt;/b&gt; и <mark>книга</mark>',
+        )
+
+
+class SearchTestMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Author')
+        cls.rare = Post.objects.create(
+            author=cls.user, text='Читаю книгу про старые поезда'
+        )
+        cls.frequent = Post.objects.create(
+            author=cls.user, text='Книга за книгой: книги о поездах'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='Совсем другой текст'
+        )
+
+    def search(self, query):
+        return [post.pk for post in SearchResults(query)[:10]]
+
+    def test_finds_other_word_forms_ranked(self):
+        self.assertEqual(
+            self.search('книги'), [self.frequent.pk, self.rare.pk]
+        )
+
+    def test_requires_all_terms(self):
+        self.assertEqual(self.search('старый поезд'), [self.rare.pk])
+        self.assertEqual(self.search('книга отсутствует'), [])
+
+    def test_index_follows_edit_and_delete(self):
+        other = Post.objects.get(pk=self.other.pk)
+        other.text = 'Теперь тоже про поезд'
+        other.save()
+        self.assertIn(other.pk, self.search('поезд'))
+        Post.objects.get(pk=self.frequent.pk).delete()
+        self.assertEqual(self.search('книга'), [self.rare.pk])
+
+    def test_rebuild_command(self):
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertCountEqual(
+            self.search('поезда'), [self.frequent.pk, self.rare.pk]
+        )
+
+
+class FTS5SearchTest(SearchTestMixin, TestCase):
+    def setUp(self):
+        if not fts5_ready():
+            self.skipTest('SQLite без FTS5')
+
+    def test_term_table_unused(self):
+        self.assertFalse(SearchTerm.objects.exists())
+
+
+@override_settings(POSTS_SEARCH_BACKEND='terms')
+class TermIndexSearchTest(SearchTestMixin, TestCase):
+    def test_term_table_filled(self):
+        self.assertTrue(SearchTerm.objects.filter(post=self.rare).exists())
+
+
+@override_settings(POSTS_ON_PAGE=1)
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Author')
+        for text in ('Первый поезд', 'Второй поезд', 'Без совпадений'):
+            Post.objects.create(author=cls.user, text=text)
+
+    def test_search_page(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'поезда'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 2)
+        self.assertContains(response, '<mark>поезд</mark>')
+        self.assertContains(
+            response, '?q=%D0%BF%D0%BE%D0%B5%D0%B7%D0%B4%D0%B0&amp;page=2'
+        )
+
+    def test_empty_query(self):
+        response = self.client.get(reverse('posts:search'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
@@ -1,9 +1,20 @@
-from django.test import Client, TestCase
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.shortcuts import render
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
 from django.urls import reverse
+from django.utils import timezone
 from django import forms
 
 from yatube.settings import POSTS_ON_PAGE
 from posts.models import Post, Group, User
+from posts.cache import page_cache_stats
+from posts.checks import check_feed_caches
+from posts.utils import CachedCountPaginator, feed_count_key, paginator_func
 
 POSTS_CREATED = 15
 
@@ -185,3 +196,418 @@ class PaginatorViewsTest(TestCase):
         self.assertEqual(len(
             response.context['page_obj']), (POSTS_CREATED - POSTS_ON_PAGE)
         )
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        # С locmem ETag ленты читает MAX(modified) и число постов
+        cls.urls = (
+            (reverse('posts:index'), 4),
+            (reverse('posts:group_list', kwargs={'slug': cls.group.slug}), 5),
+            (reverse('posts:profile', kwargs={'username': cls.user}), 5),
+        )
+
+    def create_posts(self, count):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'{i}', group=self.group)
+            for i in range(count)
+        )
+
+    def test_feed_queries_do_not_depend_on_posts_on_page(self):
+        """Число запросов ленты не зависит от количества постов."""
+        for count in (1, POSTS_ON_PAGE - 1):
+            self.create_posts(count)
+            for url, queries in self.urls:
+                with self.subTest(url=url, posts=Post.objects.count()):
+                    with self.assertNumQueries(queries):
+                        self.client.get(url)
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'{i}')
+            for i in range(POSTS_CREATED)
+        )
+        # Одинаковые даты: порядок держится на id
+        Post.objects.update(pub_date=timezone.now())
+        cls.factory = RequestFactory()
+
+    def get_page(self, cursor=None):
+        request = self.factory.get('/', {'cursor': cursor} if cursor else {})
+        return paginator_func(request, Post.objects.feed(), cursor=True)
+
+    def test_cursor_pages_follow_feed_order(self):
+        first = self.get_page()
+        self.assertEqual(len(first), POSTS_ON_PAGE)
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+        second = self.get_page(first.next_cursor)
+        self.assertEqual(len(second), POSTS_CREATED - POSTS_ON_PAGE)
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        self.assertEqual(list(first) + list(second), expected)
+
+        back = self.get_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_cursor_page_is_single_query(self):
+        cursor = self.get_page().next_cursor
+        with self.assertNumQueries(1):
+            self.get_page(cursor)
+
+    def test_broken_cursor_returns_first_page(self):
+        first = self.get_page()
+        for cursor in ('garbage', 'WzEsIDIsIDNd', first.next_cursor[:-3]):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(list(self.get_page(cursor)), list(first))
+
+
+@override_settings(POSTS_COUNT_CACHE_TIMEOUT=60)
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_count(self, url):
+        return self.client.get(url).context['page_obj'].paginator.count
+
+    @override_settings(SHARED_CACHE=True)
+    def test_count_is_cached(self):
+        self.client.get(reverse('posts:index'))
+        # ETag собирается из версий тегов в кеше, число постов тоже
+        # из кеша: остаётся один запрос страницы постов
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:index'))
+
+    def test_count_reset_on_create_and_delete(self):
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        self.assertEqual(self.get_count(url), 1)
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(self.get_count(url), 2)
+        post.delete()
+        self.assertEqual(self.get_count(url), 1)
+
+    def test_count_reset_when_post_changes_group(self):
+        urls = [
+            reverse('posts:group_list', kwargs={'slug': group.slug})
+            for group in (self.group, self.other_group)
+        ]
+        self.assertEqual([self.get_count(url) for url in urls], [1, 0])
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual([self.get_count(url) for url in urls], [0, 1])
+
+    def test_page_window_is_bounded(self):
+        paginator = CachedCountPaginator(range(10000), POSTS_ON_PAGE)
+        cases = {
+            1: [1, 2, 3, None, 1000],
+            500: [1, None, 498, 499, 500, 501, 502, None, 1000],
+            999: [1, None, 997, 998, 999, 1000],
+        }
+        for number, window in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(paginator.page(number).page_window, window)
+        small = CachedCountPaginator(range(30), POSTS_ON_PAGE)
+        self.assertEqual(small.page(2).page_window, [1, 2, 3])
+
+
+class CommitInvalidationTest(TransactionTestCase):
+    def test_count_dropped_after_commit(self):
+        user = User.objects.create_user(username="Author")
+        cache.clear()
+        with transaction.atomic():
+            Post.objects.create(author=user, text='Новый пост')
+            # Читатель закешировал число постов до коммита
+            cache.set(feed_count_key(), 0)
+        self.assertIsNone(cache.get(feed_count_key()))
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=60)
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.index_url = reverse('posts:index')
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+        cls.other_group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.other_group.slug}
+        )
+        cls.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.id}
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertCached(self, url, cached=True):
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'],
+                         'hit' if cached else 'miss')
+
+    def test_anonymous_pages_served_from_cache(self):
+        urls = (
+            self.index_url,
+            self.group_url,
+            reverse('posts:profile', kwargs={'username': self.user}),
+            self.detail_url,
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertCached(url, cached=False)
+                hits = page_cache_stats['hits']
+                with self.assertNumQueries(0):
+                    self.assertCached(url)
+                self.assertEqual(page_cache_stats['hits'], hits + 1)
+
+    def test_pages_are_keyed_by_page_number(self):
+        self.client.get(self.index_url)
+        self.assertCached(self.index_url + '?page=2', cached=False)
+
+    def test_authorized_user_bypasses_cache(self):
+        self.client.get(self.index_url)
+        self.client.force_login(self.user)
+        response = self.client.get(self.index_url)
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertContains(response, self.user.username)
+
+    def test_new_post_invalidates_only_affected_pages(self):
+        for url in (self.index_url, self.group_url, self.other_group_url):
+            self.client.get(url)
+        Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group
+        )
+        self.assertCached(self.index_url, cached=False)
+        self.assertCached(self.group_url, cached=False)
+        self.assertCached(self.other_group_url)
+
+    def test_group_change_invalidates_post_detail(self):
+        self.client.get(self.detail_url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Новое название')
+
+    def test_page_rendered_during_write_not_cached(self):
+        def render_with_write(*args, **kwargs):
+            response = render(*args, **kwargs)
+            Post.objects.create(author=self.user, text='Во время рендера')
+            return response
+
+        with mock.patch('posts.views.render', side_effect=render_with_write):
+            self.client.get(self.index_url)
+        response = self.client.get(self.index_url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Во время рендера')
+
+    def test_author_change_invalidates_feeds_with_author_posts(self):
+        self.client.get(self.index_url)
+        self.user.first_name = 'Новое'
+        self.user.save()
+        self.assertCached(self.index_url, cached=False)
+
+
+class FeedCacheCheckTest(SimpleTestCase):
+    @override_settings(PAGE_CACHE_TIMEOUT=60, POSTS_COUNT_CACHE_TIMEOUT=0)
+    def test_page_cache_needs_shared_cache(self):
+        with self.settings(SHARED_CACHE=False):
+            errors = check_feed_caches(None)
+        self.assertEqual([error.id for error in errors], ['posts.E001'])
+        with self.settings(SHARED_CACHE=True):
+            self.assertEqual(check_feed_caches(None), [])
+
+
+@override_settings(POST_CARD_CACHE_TIMEOUT=60)
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_rerendered_only_after_edit(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                self.client.get(url)
+                # update() не меняет дату изменения: карточка из кеша
+                Post.objects.filter(pk=self.post.pk).update(text='Тихо')
+                self.assertContains(self.client.get(url), self.post.text)
+                post = Post.objects.get(pk=self.post.pk)
+                post.text = 'Отредактировано'
+                post.save()
+                self.assertContains(self.client.get(url), post.text)
+                post.text = self.post.text
+                post.save()
+
+    def test_cards_follow_author_and_group_change(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            self.client.get(url)
+        author = User.objects.get(pk=self.user.pk)
+        author.first_name = 'Новое'
+        author.last_name = 'Имя'
+        author.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Новое Имя')
+                self.assertContains(
+                    response, reverse('posts:group_list', args=['new-slug'])
+                )
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_not_modified_without_rendering(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+                self.assertEqual(response.content, b'')
+
+    def test_etag_changes_with_posts(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Отредактировано'
+        post.save()
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        etag = self.client.get(self.urls[0])['ETag']
+        self.client.force_login(self.user)
+        response = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_etag_changes_after_write_in_other_process(self):
+        """Пост, созданный другим процессом со своим locmem, не сбрасывает
+        теги в кеше этого процесса, но ETag лент всё равно меняется."""
+        feeds = self.urls[:3]
+        etags = [self.client.get(url)['ETag'] for url in feeds]
+        with mock.patch('posts.cache.cache', LocMemCache('other', {})):
+            Post.objects.create(
+                author=self.user, text='Новый пост', group=self.group
+            )
+        for url, etag in zip(feeds, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_cached_page_answers_not_modified(self):
+        etag = self.client.get(self.urls[0])['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.urls[0], HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(SHARED_CACHE=True)
+class SharedCacheConditionalGetTest(ConditionalGetTest):
+    """Те же проверки с ETag из версий тегов общего кеша."""
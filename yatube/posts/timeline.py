@@ -0,0 +1,152 @@
+"""Лента подписок.
+
+Посты раскладываются по лентам подписчиков при публикации
+(fan-out on write), поэтому страница ленты — один проход по индексу
+TimelineEntry. Посты авторов и групп, у которых подписчиков больше
+FOLLOW_FAN_OUT_LIMIT, не раскладываются: такие ленты дочитываются
+из Post при чтении (fan-out on read).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .cache import invalidate_tags
+from .counters import change_follower_count
+from .models import Follow, Post, TimelineEntry
+
+# Сколько последних постов добавить в ленту при новой подписке
+BACKFILL_POSTS = 100
+FAN_OUT_BATCH_SIZE = 1000
+
+
+def add_entries(user_ids, posts):
+    """Записи лент для пользователей и пар (id поста, дата)."""
+    entries = [
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id in user_ids
+        for post_id, pub_date in posts
+    ]
+    TimelineEntry.objects.bulk_create(
+        entries, FAN_OUT_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    """Кладёт пост в ленты подписчиков его автора и группы."""
+    fan_out_posts([post])
+
+
+def fan_out_posts(posts):
+    """Кладёт пачку постов в ленты подписчиков их авторов и групп.
+    Подписчики всех авторов и групп пачки читаются одним запросом."""
+    limit = settings.FOLLOW_FAN_OUT_LIMIT
+    by_author = defaultdict(list)
+    by_group = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append((post.pk, post.pub_date))
+        if post.group_id is not None:
+            by_group[post.group_id].append((post.pk, post.pub_date))
+    follows = Follow.objects.filter(
+        Q(author_id__in=list(by_author),
+          author__post_stats__follower_count__lte=limit)
+        | Q(group_id__in=list(by_group), group__follower_count__lte=limit)
+    ).values_list('user_id', 'author_id', 'group_id')
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id, author_id, group_id in follows.iterator()
+            for post_id, pub_date in (
+                by_author[author_id] if author_id else by_group[group_id]
+            )
+        ),
+        FAN_OUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune_entries(post):
+    """Убирает пост из лент читателей, которые не подписаны ни на его
+    автора, ни на группу: записи остаются от прежней группы или автора
+    после переноса поста."""
+    targets = Q(author_id=post.author_id)
+    if post.group_id is not None:
+        targets |= Q(group_id=post.group_id)
+    TimelineEntry.objects.filter(post=post).exclude(
+        user__in=Follow.objects.filter(targets).values('user')
+    ).delete()
+
+
+def follow(user, author=None, group=None):
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(
+            user=user, author=author, group=group
+        )
+        if not created:
+            return
+        change_follower_count(
+            getattr(author, 'pk', None), getattr(group, 'pk', None), 1
+        )
+        target = {'author': author} if author else {'group': group}
+        posts = Post.objects.filter(**target).values_list('pk', 'pub_date')
+        add_entries([user.pk], posts[:BACKFILL_POSTS])
+    invalidate_tags(f'follows:{user.pk}')
+
+
+def unfollow(user, author=None, group=None):
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            user=user, author=author, group=group
+        ).delete()
+        if not deleted:
+            return
+        change_follower_count(
+            getattr(author, 'pk', None), getattr(group, 'pk', None), -1
+        )
+        # Посты остаются в ленте, если попали в неё и по другой подписке
+        follows = Follow.objects.filter(user=user)
+        groups = follows.filter(group__isnull=False).values('group')
+        authors = follows.filter(author__isnull=False).values('author')
+        entries = TimelineEntry.objects.filter(user=user)
+        if author is not None:
+            entries = entries.filter(post__author=author).exclude(
+                post__group__in=groups
+            )
+        else:
+            entries = entries.filter(post__group=group).exclude(
+                post__author__in=authors
+            )
+        entries.delete()
+    invalidate_tags(f'follows:{user.pk}')
+
+
+def with_following(queryset, user, field):
+    """Авторы или группы с флагом is_followed: подписан ли на них user.
+    Флаг считается в том же запросе, анонимным он не нужен."""
+    if not user.is_authenticated:
+        return queryset
+    return queryset.annotate(is_followed=Exists(
+        Follow.objects.filter(user=user, **{field: OuterRef('pk')})
+    ))
+
+
+def timeline_posts(user):
+    """Посты ленты подписок пользователя, новые сначала."""
+    limit = settings.FOLLOW_FAN_OUT_LIMIT
+    pulled = list(Follow.objects.filter(user=user).filter(
+        Q(author__post_stats__follower_count__gt=limit)
+        | Q(group__follower_count__gt=limit)
+    ).values_list('author_id', 'group_id'))
+    posts = Post.objects.feed()
+    if not pulled:
+        return posts.filter(timeline_entries__user=user).order_by(
+            '-timeline_entries__pub_date', '-timeline_entries__post'
+        )
+    authors = [author_id for author_id, _ in pulled if author_id]
+    groups = [group_id for _, group_id in pulled if group_id]
+    return posts.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+        | Q(author_id__in=authors)
+        | Q(group_id__in=groups)
+    )
@@ -0,0 +1,78 @@
+import csv
+import json
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Post
+
+FIELDS = ('text', 'pub_date', 'author', 'group')
+FORMATS = ('ndjson', 'csv')
+
+
+def detect_format(path, fmt=None):
+    """Формат из опции команды или по расширению файла."""
+    if fmt:
+        return fmt
+    return 'csv' if path.endswith('.csv') else 'ndjson'
+
+
+def read_records(stream, fmt):
+    """Построчно читает записи постов, не загружая файл в память.
+    Вместо строки NDJSON, которая не разбирается в объект, выдаёт None."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield record if isinstance(record, dict) else None
+
+
+class RecordWriter:
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.writer = csv.DictWriter(stream, FIELDS)
+            self.writer.writeheader()
+
+    def write(self, record):
+        if self.fmt == 'csv':
+            self.writer.writerow(record)
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def parse_pub_date(value):
+    """Дата публикации из файла, дата без часового пояса считается
+    в TIME_ZONE. Для неверной даты — ValueError."""
+    if not value:
+        return None
+    pub_date = parse_datetime(value)
+    if pub_date is None:
+        raise ValueError(f'Неверная дата: {value}')
+    if settings.USE_TZ and timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+@contextmanager
+def keep_post_dates():
+    """Отключает auto_now_add/auto_now у дат поста, чтобы bulk_create
+    сохранил даты из файла вместо текущего времени."""
+    fields = [Post._meta.get_field(name) for name in ('pub_date', 'modified')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -1,10 +1,185 @@
-from django.core.paginator import Paginator
+import json
+from collections.abc import Sequence
 
-from yatube.settings import POSTS_ON_PAGE
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 
+NEXT = 'n'
+PREVIOUS = 'p'
+PAGES_ON_EACH_SIDE = 2
+PAGES_ON_ENDS = 1
 
-def paginator_func(request, post_list):
-    paginator = Paginator(post_list, POSTS_ON_PAGE)
+
+def feed_count_key(group_id=None, author_id=None):
+    """Ключ кеша с числом постов ленты: общей, группы или автора."""
+    if group_id is not None:
+        return f'posts:count:group:{group_id}'
+    if author_id is not None:
+        return f'posts:count:author:{author_id}'
+    return 'posts:count:all'
+
+
+def post_count_keys(*feeds):
+    """Ключи счётчиков лент для пар (author_id, group_id) постов."""
+    keys = {feed_count_key()}
+    for author_id, group_id in feeds:
+        keys.add(feed_count_key(author_id=author_id))
+        if group_id is not None:
+            keys.add(feed_count_key(group_id=group_id))
+    return keys
+
+
+def encode_cursor(post, direction):
+    """Непрозрачный токен позиции в ленте: (pub_date, id) и направление."""
+    data = json.dumps([post.pub_date.isoformat(), post.pk, direction])
+    return urlsafe_base64_encode(data.encode())
+
+
+def decode_cursor(token):
+    """Разбирает токен, для испорченного токена возвращает None."""
+    try:
+        pub_date, pk, direction = json.loads(urlsafe_base64_decode(token))
+        pub_date = parse_datetime(pub_date)
+    except (TypeError, ValueError):
+        return None
+    if pub_date is None or not isinstance(pk, int):
+        return None
+    if direction not in (NEXT, PREVIOUS):
+        return None
+    return pub_date, pk, direction
+
+
+class CursorPage(Sequence):
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page of %s>' % len(self)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по ключу (pub_date, id) без COUNT(*) и OFFSET:
+    страница на любой глубине выбирается одним запросом по индексу."""
+    is_cursor = True
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def get_page(self, token):
+        position = decode_cursor(token) if token else None
+        if position is None:
+            return self._page(self.object_list.order_by('-pub_date', '-pk'))
+        pub_date, pk, direction = position
+        if direction == NEXT:
+            after = (
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+            return self._page(
+                self.object_list.filter(after).order_by('-pub_date', '-pk'),
+                has_previous=True,
+            )
+        before = Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        return self._page(
+            self.object_list.filter(before).order_by('pub_date', 'pk'),
+            has_next=True,
+            reverse=True,
+        )
+
+    def _page(self, queryset, has_next=False, has_previous=False,
+              reverse=False):
+        posts = list(queryset[:self.per_page + 1])
+        has_more = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        if reverse:
+            posts.reverse()
+            has_previous = has_more
+        else:
+            has_next = has_more
+        next_cursor = previous_cursor = None
+        if posts and has_next:
+            next_cursor = encode_cursor(posts[-1], NEXT)
+        if posts and has_previous:
+            previous_cursor = encode_cursor(posts[0], PREVIOUS)
+        return CursorPage(posts, self, next_cursor, previous_cursor)
+
+
+class FeedPage(Page):
+    @property
+    def page_window(self):
+        """Номера страниц вокруг текущей и по краям,
+        пропуски между ними обозначены None."""
+        num_pages = self.paginator.num_pages
+        shown = set(range(1, min(PAGES_ON_ENDS, num_pages) + 1))
+        shown.update(range(max(num_pages - PAGES_ON_ENDS + 1, 1),
+                           num_pages + 1))
+        shown.update(range(max(self.number - PAGES_ON_EACH_SIDE, 1),
+                           min(self.number + PAGES_ON_EACH_SIDE,
+                               num_pages) + 1))
+        window = []
+        for number in sorted(shown):
+            if window and number - window[-1] > 1:
+                window.append(None)
+            window.append(number)
+        return window
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт число постов ленты из кеша.
+    Ключи сбрасываются сигналами при создании, удалении
+    и переносе постов, так что COUNT(*) выполняется редко."""
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        timeout = settings.POSTS_COUNT_CACHE_TIMEOUT
+        if self.count_key is None or not timeout:
+            return super().count
+        count = cache.get(self.count_key)
+        if count is None:
+            count = super().count
+            cache.set(self.count_key, count, timeout)
+        return count
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+def paginator_func(request, post_list, count_key=None, cursor=None):
+    if cursor is None:
+        cursor = settings.CURSOR_PAGINATION
+    if cursor:
+        paginator = CursorPaginator(post_list, settings.POSTS_ON_PAGE)
+        return paginator.get_page(request.GET.get('cursor'))
+    paginator = CachedCountPaginator(
+        post_list, settings.POSTS_ON_PAGE, count_key=count_key
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
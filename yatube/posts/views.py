@@ -1,48 +1,100 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.utils.http import urlencode
+from django.views.decorators.http import etag, require_POST
 
+from .cache import (cache_page_for_anonymous, group_etag, index_etag,
+                    post_etag, post_tags, profile_etag, tag_response)
 from .forms import PostForm
 from .models import Group, Post, User
-from .utils import paginator_func
+from .search import SearchResults
+from .timeline import follow, timeline_posts, unfollow, with_following
+from .utils import feed_count_key, paginator_func
 
 
+@cache_page_for_anonymous
+@etag(index_etag)
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.all()
+    post_list = Post.objects.feed()
+    page_obj = paginator_func(request, post_list, feed_count_key())
     context = {
-        'page_obj': paginator_func(request, post_list),
+        'page_obj': page_obj,
     }
-    return render(request, template, context)
+    response = render(request, template, context)
+    return tag_response(response, 'feed', *post_tags(*page_obj))
 
 
+@cache_page_for_anonymous
+@etag(group_etag)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.publications.all()
+    group = get_object_or_404(
+        with_following(Group.objects.all(), request.user, 'group'),
+        slug=slug,
+    )
+    post_list = group.publications.feed()
+    page_obj = paginator_func(
+        request, post_list, feed_count_key(group_id=group.id)
+    )
     context = {
         'group': group,
-        'page_obj': paginator_func(request, post_list),
+        'page_obj': page_obj,
     }
-    return render(request, template, context)
+    response = render(request, template, context)
+    return tag_response(
+        response, f'group:{group.id}', *post_tags(*page_obj)
+    )
 
 
+@cache_page_for_anonymous
+@etag(profile_etag)
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    author = get_object_or_404(
+        with_following(
+            User.objects.select_related('post_stats'), request.user, 'author'
+        ),
+        username=username,
+    )
+    post_list = author.posts.feed()
+    page_obj = paginator_func(
+        request, post_list, feed_count_key(author_id=author.id)
+    )
     context = {
-        'page_obj': paginator_func(request, post_list),
+        'page_obj': page_obj,
         'author': author
     }
-    return render(request, template, context)
+    response = render(request, template, context)
+    return tag_response(
+        response, f'author:{author.id}', *post_tags(*page_obj)
+    )
 
 
+@cache_page_for_anonymous
+@etag(post_etag)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html',
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__post_stats', 'group'),
+        id=post_id,
+    )
     context = {
         'post': post,
     }
+    response = render(request, template, context)
+    return tag_response(response, f'post:{post.id}', *post_tags(post))
+
+
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = paginator_func(request, SearchResults(query), cursor=False)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
     return render(request, template, context)
 
 
@@ -59,7 +111,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.select_related('author'), id=post_id)
 
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post.id)
@@ -76,3 +128,46 @@ def post_edit(request, post_id):
     }
 
     return render(request, 'posts/create_post.html', context)
+
+
+@login_required
+def follow_index(request):
+    template = 'posts/follow.html'
+    page_obj = paginator_func(request, timeline_posts(request.user))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        follow(request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    unfollow(request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_POST
+def group_follow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    follow(request.user, group=group)
+    return redirect('posts:group_list', slug=slug)
+
+
+@login_required
+@require_POST
+def group_unfollow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    unfollow(request.user, group=group)
+    return redirect('posts:group_list', slug=slug)
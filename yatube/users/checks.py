@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register()
+def check_session_cache(app_configs, **kwargs):
+    """Сессии в кеше годятся только для общего кеша: иначе сессия,
+    завершённая в одном процессе, остаётся действительной в других."""
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES and (
+            not settings.SHARED_CACHE):
+        return [Error(
+            f'{settings.SESSION_ENGINE} требует общего для процессов кеша',
+            hint='Задайте CACHE_BACKEND=file или redis либо SESSION_STORE=db',
+            id='users.E001',
+        )]
+    return []
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.sessions import purge_expired_sessions
+from users.tasks import schedule_purge
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии из базы пачками. С --schedule ставит '
+        'в очередь фоновых задач очистку раз в SESSION_PURGE_INTERVAL'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.SESSION_PURGE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--pause', type=float, default=settings.SESSION_PURGE_PAUSE,
+            help='Пауза в секундах между пачками',
+        )
+        parser.add_argument(
+            '--schedule', action='store_true',
+            help='Не удалять сейчас, а запланировать очистку воркерами',
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule_purge()
+            if settings.JOBS_EAGER:
+                self.stdout.write(
+                    'JOBS_EAGER: сессии очищены сразу, повторная очистка '
+                    'не планируется'
+                )
+            else:
+                self.stdout.write('Очистка сессий запланирована')
+            return
+        deleted = purge_expired_sessions(
+            options['batch_size'], options['pause']
+        )
+        self.stdout.write(f'Удалено сессий: {deleted}')
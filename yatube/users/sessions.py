@@ -0,0 +1,24 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+
+def purge_expired_sessions(batch_size, pause=0):
+    """Удаляет истёкшие сессии пачками по первичному ключу.
+
+    Каждая пачка удаляется отдельной короткой транзакцией, и между
+    ними запросы успевают писать в таблицу сессий. Возвращает число
+    удалённых сессий.
+    """
+    deleted = 0
+    while True:
+        keys = list(Session.objects.filter(
+            expire_date__lt=timezone.now()
+        ).values_list('session_key', flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+        if len(keys) < batch_size:
+            return deleted
+        time.sleep(pause)
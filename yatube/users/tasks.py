@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+
+from core.jobs import enqueue, task
+
+from .sessions import purge_expired_sessions
+
+
+def schedule_purge():
+    """Ставит очистку сессий на следующий интервал; ключ — номер
+    интервала, поэтому несколько воркеров не задвоят её."""
+    interval = settings.SESSION_PURGE_INTERVAL
+    slot = int(time.time() // interval) + 1
+    return enqueue(
+        'users.purge_sessions', key=f'purge-sessions:{slot}',
+        delay=slot * interval - time.time(),
+    )
+
+
+@task('users.purge_sessions')
+def purge_sessions():
+    """Удаляет истёкшие сессии и планирует следующую очистку."""
+    purge_expired_sessions(
+        settings.SESSION_PURGE_BATCH_SIZE, settings.SESSION_PURGE_PAUSE
+    )
+    # Без очереди следующая очистка выполнилась бы сразу же
+    if not settings.JOBS_EAGER:
+        schedule_purge()
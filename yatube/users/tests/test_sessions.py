@@ -0,0 +1,133 @@
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.jobs import run_pending
+from core.models import Job
+from posts.models import User
+from users.backends import CachedModelBackend, user_cache_key
+from users.checks import check_session_cache
+from users.sessions import purge_expired_sessions
+
+
+class CachedModelBackendTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='Reader')
+        self.backend = CachedModelBackend()
+
+    def test_user_loaded_once(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.pk)
+        self.assertEqual(user, self.user)
+
+    def test_save_drops_cached_user(self):
+        self.backend.get_user(self.user.pk)
+        self.user.first_name = 'Читатель'
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(
+            self.backend.get_user(self.user.pk).first_name, 'Читатель'
+        )
+
+    def test_password_change_drops_cached_user(self):
+        self.backend.get_user(self.user.pk)
+        self.user.set_password('Ytr5-new-pass')
+        self.user.save()
+        self.assertEqual(
+            self.backend.get_user(self.user.pk).password, self.user.password
+        )
+
+    def test_inactive_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+    @override_settings(
+        AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend'],
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+        SHARED_CACHE=True,
+    )
+    def test_logged_in_page_without_auth_queries(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('users:password_change_form'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:password_change_form'))
+        self.assertContains(response, 'Reader')
+
+    def test_session_ended_by_other_worker(self):
+        """Выход в другом воркере удаляет сессию из базы и из своего
+        кеша: без общего кеша сессия не должна пережить это здесь."""
+        self.client.force_login(self.user)
+        url = reverse('users:password_change_form')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        Session.objects.all().delete()
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class SessionCacheCheckTest(SimpleTestCase):
+    def test_cached_sessions_need_shared_cache(self):
+        engine = 'django.contrib.sessions.backends.cached_db'
+        with self.settings(SESSION_ENGINE=engine, SHARED_CACHE=False):
+            errors = check_session_cache(None)
+        self.assertEqual([error.id for error in errors], ['users.E001'])
+        with self.settings(SESSION_ENGINE=engine, SHARED_CACHE=True):
+            self.assertEqual(check_session_cache(None), [])
+
+
+class PurgeSessionsTest(TestCase):
+    def create_sessions(self, count, expire_date):
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'{expire_date:%s}-{i}',
+                session_data='',
+                expire_date=expire_date,
+            )
+            for i in range(count)
+        )
+
+    def setUp(self):
+        now = timezone.now()
+        self.create_sessions(5, now - timedelta(days=1))
+        self.create_sessions(2, now + timedelta(days=1))
+
+    def test_purge_in_batches(self):
+        self.assertEqual(purge_expired_sessions(batch_size=2), 5)
+        self.assertEqual(Session.objects.count(), 2)
+
+    def test_purge_command(self):
+        out = StringIO()
+        call_command('purge_sessions', '--batch-size', '3', stdout=out)
+        self.assertIn('Удалено сессий: 5', out.getvalue())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_schedule_purges_once(self):
+        out = StringIO()
+        call_command('purge_sessions', '--schedule', stdout=out)
+        self.assertIn('не планируется', out.getvalue())
+        self.assertEqual(Session.objects.count(), 2)
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_EAGER=False)
+    def test_scheduled_purge_reschedules(self):
+        call_command('purge_sessions', '--schedule', stdout=StringIO())
+        call_command('purge_sessions', '--schedule', stdout=StringIO())
+        self.assertEqual(Job.objects.count(), 1)
+        Job.objects.update(run_at=timezone.now())
+        later = time.time() + settings.SESSION_PURGE_INTERVAL
+        with mock.patch('users.tasks.time.time', return_value=later):
+            run_pending()
+        self.assertEqual(Session.objects.count(), 2)
+        self.assertEqual(
+            Job.objects.filter(status=Job.PENDING).count(), 1
+        )
@@ -0,0 +1,45 @@
+from django.core import mail
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.budgets import BudgetTestMixin, VIEW_BUDGETS
+from posts.models import User
+from users.urls import urlpatterns
+
+
+class UsersBudgetTest(BudgetTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Reader')
+
+    def test_pages_within_budget(self):
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        for pattern in urlpatterns:
+            name = f'users:{pattern.name}'
+            with self.subTest(name=name):
+                self.assertIn(name, VIEW_BUDGETS)
+                self.assertWithinBudget(reverse(name), authorized_client)
+                self.assertWithinBudget(reverse(name))
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class SignUpEmailTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_welcome_email_sent_through_queue(self):
+        self.client.post(reverse('users:signup'), {
+            'username': 'Reader',
+            'email': 'reader@ya.tube',
+            'password1': 'Ytr5-long-pass',
+            'password2': 'Ytr5-long-pass',
+        })
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@ya.tube'])
+        self.assertIn('Reader', mail.outbox[0].body)
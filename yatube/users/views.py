@@ -1,3 +1,5 @@
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
 
@@ -9,3 +11,17 @@ class SignUp(CreateView):
     # После успешной регистрации перенаправляем пользователя на главную.
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        # Письмо уходит через очередь и не задерживает ответ
+        if self.object.email:
+            send_mail(
+                'Добро пожаловать в Yatube',
+                render_to_string(
+                    'users/emails/welcome.txt', {'user': self.object}
+                ),
+                None,
+                [self.object.email],
+            )
+        return response
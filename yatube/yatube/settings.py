@@ -23,7 +23,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'c%3+6s%si=n+lf0)ordgi8*(x$u6*j+)rm=a7^h1d1^&61t-9$'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -48,6 +48,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.SlowRequestProfilerMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,18 +65,37 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
+# TEMPLATE_CACHE: шаблоны разбираются один раз на процесс, а не на каждый
+# запрос. По умолчанию включён без DEBUG; правки шаблонов тогда видны
+# только после перезапуска. Прогревает кеш yatube/wsgi.py при старте
+TEMPLATE_CACHE = os.getenv('TEMPLATE_CACHE', '0' if DEBUG else '1') == '1'
+
+# TEMPLATE_MINIFY: из шаблонов HTML убираются отступы и комментарии
+TEMPLATE_MINIFY = os.getenv('TEMPLATE_MINIFY', '0') == '1'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_MINIFY:
+    TEMPLATE_LOADERS = [('core.loaders.Loader', TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': (
+                [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+                if TEMPLATE_CACHE else TEMPLATE_LOADERS
+            ),
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.cache.cache_timeouts',
             ],
         },
     },
@@ -83,14 +106,106 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+# DATABASE_ENGINE: sqlite (по умолчанию) или postgresql
+
+DATABASE_ENGINE = os.getenv('DATABASE_ENGINE', 'sqlite')
+
+DATABASE_ENGINES = {
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv(
+            'DATABASE_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        # Выполняются для каждого нового соединения, см. core.db.
+        # В режиме WAL запись не блокирует читателей, busy_timeout —
+        # сколько миллисекунд ждать чужую запись вместо ошибки
+        'PRAGMAS': {
+            'journal_mode': 'wal',
+            'synchronous': 'normal',
+            'mmap_size': 256 * 1024 * 1024,
+            'busy_timeout': 5000,
+        },
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('DATABASE_NAME', 'yatube'),
+        'USER': os.getenv('DATABASE_USER', 'yatube'),
+        'PASSWORD': os.getenv('DATABASE_PASSWORD', ''),
+        'HOST': os.getenv('DATABASE_HOST', 'localhost'),
+        'PORT': os.getenv('DATABASE_PORT', '5432'),
+    },
+}
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        **DATABASE_ENGINES[DATABASE_ENGINE],
+        # Сколько секунд соединение переживает запросы, 0 — закрывается
+        'CONN_MAX_AGE': int(os.getenv('DATABASE_CONN_MAX_AGE', 60)),
+        # Живое соединение проверяется в начале запроса, см. core.db
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# DATABASE_REPLICAS: имена реплик через запятую, например replica1,replica2.
+# Локально реплика — отдельный файл SQLite, его обновляет sync_replicas,
+# реплике PostgreSQL адрес задаёт DATABASE_<ИМЯ>_HOST
+DATABASE_REPLICAS = [
+    alias for alias in os.getenv('DATABASE_REPLICAS', '').split(',') if alias
+]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    if DATABASE_ENGINE == 'sqlite':
+        DATABASES[alias]['NAME'] = os.path.join(
+            BASE_DIR, f'db.{alias}.sqlite3'
+        )
+    else:
+        DATABASES[alias]['HOST'] = os.getenv(
+            f'DATABASE_{alias.upper()}_HOST', alias
+        )
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# CACHE_BACKEND: locmem (по умолчанию), file или redis
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube',
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES, 'CULL_FREQUENCY': 3},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES, 'CULL_FREQUENCY': 3},
+    },
+    'redis': {
+        'BACKEND': 'core.cache_backends.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/0'),
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 60 * 5)),
+        # Смена версии при деплое сразу делает недоступным весь старый кеш
+        'KEY_PREFIX': 'yatube',
+        'VERSION': int(os.getenv('CACHE_VERSION', 1)),
+    }
+}
+
+# Кеш общий для всех процессов. У locmem кеш свой в каждом процессе:
+# сброс ключей и версий тегов в одном воркере не виден остальным
+SHARED_CACHE = CACHE_BACKEND != 'locmem'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -133,11 +248,115 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.getenv('STATIC_ROOT', os.path.join(BASE_DIR, 'static_root'))
+
+# STATIC_PIPELINE: collectstatic добавляет к именам хеш содержимого, урезает
+# CSS по шаблонам и сохраняет сжатые копии. По умолчанию включён без DEBUG,
+# тогда перед запуском нужен manage.py collectstatic
+STATIC_PIPELINE = os.getenv('STATIC_PIPELINE', '0' if DEBUG else '1') == '1'
+if STATIC_PIPELINE:
+    STATICFILES_STORAGE = 'core.storage.PipelineStaticFilesStorage'
+# STATIC_SERVE: приложение само раздаёт STATIC_ROOT, см. core.static
+STATIC_SERVE = os.getenv('STATIC_SERVE', '0') == '1'
+
+# Sessions
+# https://docs.djangoproject.com/en/2.2/topics/http/sessions/
+# SESSION_STORE: db, cached_db, cache или signed_cookies. cached_db
+# и cache только с общим кешем (SHARED_CACHE): cached_db верит кешу
+# и не заглядывает в базу, так что с locmem сессия, завершённая в одном
+# воркере, оставалась бы действительной в остальных, см. users.checks.
+# По умолчанию cached_db с общим кешем и db без него
+
+SESSION_STORE = os.getenv(
+    'SESSION_STORE', 'cached_db' if SHARED_CACHE else 'db'
+)
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_STORE]
+
+# Пользователь сессии загружается из кеша, а не из базы. Только для общего
+# кеша: locmem у каждого процесса свой, и сброс записи после смены пароля
+# или блокировки не дошёл бы до остальных воркеров
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend'
+    if SHARED_CACHE else 'django.contrib.auth.backends.ModelBackend'
+]
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма ставятся в очередь фоновых задач, воркер отправляет их пачками
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_DELIVERY_BACKEND = os.getenv(
+    'EMAIL_DELIVERY_BACKEND',
+    'django.core.mail.backends.filebased.EmailBackend',
+)
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 25))
+# Не больше стольких писем на адрес за EMAIL_RATE_PERIOD секунд. Лимит
+# и счётчики mail_stats хранятся в кеше: с locmem лимит действует в каждом
+# воркере отдельно, а mail_stats не видит счётчиков, см. core.checks
+EMAIL_RATE_LIMIT = 5
+EMAIL_RATE_PERIOD = 60 * 60
+# Попытки отправки письма в очереди задач, читаются при запуске
+EMAIL_MAX_ATTEMPTS = 3
 POSTS_ON_PAGE = 10
+# Ленты листаются по ?cursor= вместо номеров страниц ?page=
+CURSOR_PAGINATION = False
+# Сколько секунд хранить в кеше число постов лент и страницы для анонимных
+# читателей, 0 — не кешировать. Только с общим кешем: сигналы сбрасывают
+# ключи лишь в процессе, который записал пост
+POSTS_COUNT_CACHE_TIMEOUT = 60 * 10 if SHARED_CACHE and not DEBUG else 0
+PAGE_CACHE_TIMEOUT = 60 * 10 if SHARED_CACHE and not DEBUG else 0
+# Посты авторов и групп с большим числом подписчиков не раскладываются
+# по лентам подписок при публикации, а дочитываются при открытии ленты
+FOLLOW_FAN_OUT_LIMIT = 1000
+# Индекс поиска: fts5, terms (таблица SearchTerm) или auto — FTS5 на SQLite
+POSTS_SEARCH_BACKEND = os.getenv('POSTS_SEARCH_BACKEND', 'auto')
+# Карточки постов кешируются по id и дате изменения поста
+# и по версиям тегов автора и группы, 0 — не кешировать
+POST_CARD_CACHE_TIMEOUT = 0 if DEBUG else 60 * 60
+# Замеры ответов: заголовок Server-Timing и гистограмма по view
+PERF_MIDDLEWARE = os.getenv('PERF_MIDDLEWARE', '0') == '1'
+# Раз в сколько секунд процесс сбрасывает гистограмму в кеш. perf_stats
+# читает её из кеша, поэтому нужен общий кеш (SHARED_CACHE)
+PERF_FLUSH_INTERVAL = 10
+# Запросы дольше стольких миллисекунд профилируются, 0 — выключено
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 0))
+SLOW_REQUEST_NAMESPACES = ('posts',)
+SLOW_REQUEST_SAMPLE_INTERVAL = 0.005
+# Каталог профилей медленных запросов, хранятся последние KEEP файлов
+SLOW_REQUEST_PROFILE_DIR = os.getenv(
+    'SLOW_REQUEST_PROFILE_DIR', os.path.join(BASE_DIR, 'profiles')
+)
+SLOW_REQUEST_PROFILE_KEEP = 100
+# Фоновые задачи выполняются сразу, без воркеров run_workers. По умолчанию
+# только при DEBUG: в работе индексация, раскладка по лентам и письма идут
+# через очередь, а не внутри запроса
+JOBS_EAGER = os.getenv('JOBS_EAGER', '1' if DEBUG else '0') == '1'
+# Сколько задач воркер захватывает за раз и на сколько секунд
+JOBS_BATCH_SIZE = 100
+JOBS_LEASE = 5 * 60
+# Сколько секунд после записи клиент читает из основной базы, а не из реплик
+REPLICA_STICKY_SECONDS = 5
+REPLICA_STICKY_COOKIE = 'primary_until'
+# Сколько секунд пользователь сессии хранится в кеше
+USER_CACHE_TIMEOUT = 60 * 5
+# Истёкшие сессии удаляются раз в SESSION_PURGE_INTERVAL секунд пачками
+# по SESSION_PURGE_BATCH_SIZE с паузой SESSION_PURGE_PAUSE между ними
+SESSION_PURGE_INTERVAL = 60 * 60
+SESSION_PURGE_BATCH_SIZE = 1000
+SESSION_PURGE_PAUSE = 0.1
+# CSS, из которых collectstatic удаляет правила, не нужные шаблонам
+STATIC_PURGE_CSS = ['css/bootstrap.min.css']
+# Сколько секунд браузер кеширует статику с хешем в имени
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Сжатие ответов gzip и brotli, ответы меньше COMPRESSION_MIN_SIZE байт
+# отдаются как есть
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', '1') == '1'
+COMPRESSION_MIN_SIZE = 512
@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.STATIC_SERVE:
+    from core.static import StaticFilesApp
+    application = StaticFilesApp(application)
+
+if settings.TEMPLATE_CACHE:
+    # Шаблоны разбираются до первого запроса к процессу
+    from core.template_cache import warm_templates
+    warm_templates()